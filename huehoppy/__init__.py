@@ -22,13 +22,31 @@ __author__ = "Terragon Labs"
 __email__ = "contact@terragonlabs.com"
 __license__ = "MIT"
 
-# Public API
-from .core import ColorTransferAlgorithm, HueHoppyManager
-from .cli import main as cli_main
+# Public API, imported on first attribute access (PEP 562) so that
+# "import huehoppy" stays cheap for callers that only need the version
+_LAZY_ATTRIBUTES = {
+    "ColorTransferAlgorithm": (".core", "ColorTransferAlgorithm"),
+    "HueHoppyManager": (".core", "HueHoppyManager"),
+    "Pipeline": (".core", "Pipeline"),
+    "cli_main": (".cli", "main"),
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        from importlib import import_module
+        
+        module_name, attr_name = _LAZY_ATTRIBUTES[name]
+        value = getattr(import_module(module_name, __name__), attr_name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "__version__",
     "ColorTransferAlgorithm", 
     "HueHoppyManager",
+    "Pipeline",
     "cli_main",
 ]
\ No newline at end of file
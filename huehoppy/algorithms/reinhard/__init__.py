@@ -1,5 +1,5 @@
 """Reinhard et al. color transfer algorithm."""
 
-from .algorithm import Algorithm
+from .algorithm import Algorithm, ReinhardStats
 
-__all__ = ["Algorithm"]
\ No newline at end of file
+__all__ = ["Algorithm", "ReinhardStats"]
\ No newline at end of file
@@ -6,9 +6,165 @@ Based on: "Color Transfer between Images" by Reinhard et al. (2001)
 
 import numpy as np
 import cv2
-from typing import Any
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Optional, Tuple
 
-from huehoppy.core.base import ColorTransferAlgorithm, AlgorithmMetadata
+from huehoppy.core.base import ColorTransferAlgorithm, AlgorithmMetadata, AlgorithmError
+
+# RGB -> LMS cone response matrix from Reinhard et al. (2001), with columns
+# reordered so it applies directly to OpenCV's BGR pixel layout
+_BGR_TO_LMS = np.array([
+    [0.3811, 0.5783, 0.0402],
+    [0.1967, 0.7244, 0.0782],
+    [0.0241, 0.1288, 0.8444],
+], dtype=np.float32)[:, ::-1].copy()
+_LMS_TO_BGR = np.linalg.inv(_BGR_TO_LMS).astype(np.float32)
+
+# log(LMS) -> l-alpha-beta decorrelating transform
+_LOG_LMS_TO_LAB = (
+    np.diag([1 / np.sqrt(3), 1 / np.sqrt(6), 1 / np.sqrt(2)])
+    @ np.array([[1, 1, 1], [1, 1, -2], [1, -1, 0]])
+).astype(np.float32)
+_LAB_TO_LOG_LMS = np.linalg.inv(_LOG_LMS_TO_LAB).astype(np.float32)
+
+# Working-set size for one row band of the NumPy apply pass
+_TILE_BYTES = 1 << 20
+
+# Images with fewer pixels take the NumPy apply pass: it runs them in tens of
+# milliseconds, less than importing numba and loading its compiled kernel
+_KERNEL_MIN_PIXELS = 1 << 22
+
+# Forward/backward OpenCV conversion codes for the cvtColor-based color spaces;
+# the luminance channel comes first in each of them
+_CVT_CODES = {
+    "lab": (cv2.COLOR_BGR2LAB, cv2.COLOR_LAB2BGR),
+    "ycrcb": (cv2.COLOR_BGR2YCrCb, cv2.COLOR_YCrCb2BGR),
+}
+
+
+@dataclass
+class ReinhardStats:
+    """Per-channel reference statistics fitted by the Reinhard algorithm."""
+    
+    color_space: str
+    mean: np.ndarray
+    std: np.ndarray
+
+
+def _mean_std(image: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Compute per-channel mean and standard deviation in a single pass."""
+    # View the pixels as a 3-channel column so OpenCV reduces all channels at once
+    mean, std = cv2.meanStdDev(image.reshape(-1, 1, 3))
+    return mean.ravel().astype(np.float32), std.ravel().astype(np.float32)
+
+
+def _scale_bias(
+    source_mean: np.ndarray,
+    source_std: np.ndarray,
+    reference_mean: np.ndarray,
+    reference_std: np.ndarray,
+    preserve_luminance: bool,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Fold per-channel mean/std matching into a single scale/bias pair."""
+    # Avoid division by zero
+    source_std = np.maximum(source_std, 1e-8)
+    
+    scale = (reference_std / source_std).astype(np.float32)
+    bias = (reference_mean - source_mean * scale).astype(np.float32)
+    
+    if preserve_luminance:
+        # Leave the luminance channel untouched
+        scale[0] = 1.0
+        bias[0] = 0.0
+    
+    return scale, bias
+
+
+def _subsample(image: np.ndarray, grid: int) -> np.ndarray:
+    """Stride-sample an (H, W, C) image down to roughly grid x grid pixels."""
+    if grid <= 0:
+        return image
+    
+    sy = max(1, image.shape[0] // grid)
+    sx = max(1, image.shape[1] // grid)
+    if sy == 1 and sx == 1:
+        return image
+    
+    return np.ascontiguousarray(image[::sy, ::sx])
+
+
+def _affine_rows(src, scale, bias, out):  # pragma: no cover - compiled by numba
+    """Apply scale/bias, clip to [0, 255] and cast to uint8 in one pass."""
+    height, row_size = src.shape
+    for y in range(height):
+        for i in range(row_size):
+            v = src[y, i] * scale[i] + bias[i]
+            if v < 0:
+                v = 0
+            elif v > 255:
+                v = 255
+            out[y, i] = np.uint8(v)
+
+
+@lru_cache(maxsize=None)
+def _get_affine_kernel() -> Optional[Callable[..., None]]:
+    """
+    Compile _affine_rows with numba on first use, or return None without numba.
+    
+    numba is imported lazily because importing it costs far more than the
+    NumPy path needs for typical images. The kernel is compiled for the one
+    contiguous uint8 layout it is called with and cached on disk. It stays
+    serial: a parallel kernel would run on numba's threading layer, which
+    (as "workqueue") aborts the process when two threads call transfer().
+    """
+    try:
+        from numba import njit
+    except ImportError:  # pragma: no cover - numba is an optional accelerator
+        return None
+    
+    return njit("void(u1[:, ::1], f4[::1], f4[::1], u1[:, ::1])", fastmath=True, cache=True)(
+        _affine_rows
+    )
+
+
+def _apply_affine(image: np.ndarray, scale: np.ndarray, bias: np.ndarray) -> np.ndarray:
+    """Apply a per-channel scale/bias to an (H, W, 3) image and return uint8."""
+    height, width = image.shape[:2]
+    kernel = _get_affine_kernel() if height * width >= _KERNEL_MIN_PIXELS else None
+    if kernel is not None:
+        # Treat each row as one dense W*3 stream with the channel coefficients
+        # tiled to match, so the inner loop has no per-channel indexing and
+        # vectorizes to straight SIMD multiply-adds
+        rows = np.ascontiguousarray(image).reshape(height, -1)
+        out = np.empty(image.shape, dtype=np.uint8)
+        kernel(rows, np.tile(scale, width), np.tile(bias, width), out.reshape(height, -1))
+        return out
+    
+    # Process cache-sized row bands so the multiply, add, clip and cast all
+    # run on data that is still resident in L2
+    rows = max(1, _TILE_BYTES // (width * image.shape[2] * 4))
+    out = np.empty(image.shape, dtype=np.uint8)
+    buffer = np.empty((rows,) + image.shape[1:], dtype=np.float32)
+    
+    for y0 in range(0, height, rows):
+        band = image[y0:y0 + rows]
+        tile = buffer[:band.shape[0]]
+        np.multiply(band, scale, out=tile)
+        tile += bias
+        np.clip(tile, 0, 255, out=tile)
+        out[y0:y0 + rows] = tile
+    
+    return out
+
+
+def _bgr_to_lalphabeta(image: np.ndarray) -> np.ndarray:
+    """Convert a BGR image to a flat (N, 3) float32 l-alpha-beta array."""
+    lms = image.reshape(-1, 3).astype(np.float32) @ _BGR_TO_LMS.T
+    # Clamp to one code value so the logarithm stays finite on black pixels
+    np.maximum(lms, 1.0, out=lms)
+    np.log10(lms, out=lms)
+    return lms @ _LOG_LMS_TO_LAB.T
 
 
 class Algorithm(ColorTransferAlgorithm):
@@ -29,6 +185,25 @@ class Algorithm(ColorTransferAlgorithm):
                     "type": "bool",
                     "default": False,
                     "description": "Whether to preserve luminance channel"
+                },
+                "stats_subsample": {
+                    "type": "int",
+                    "default": 0,
+                    "description": (
+                        "Compute statistics on a stride-sampled grid of about this many "
+                        "pixels per side (0 uses every pixel)"
+                    )
+                },
+                "color_space": {
+                    "type": "str",
+                    "default": "lab",
+                    "choices": ["lab", "ycrcb", "lalphabeta"],
+                    "description": (
+                        "Color space for statistics matching: 'lab' (OpenCV CIE Lab), "
+                        "'ycrcb' (linear, several times cheaper to convert than Lab) or "
+                        "'lalphabeta' (the log-space of the original paper, computed with "
+                        "matrix products instead of per-pixel Lab conversions)"
+                    )
                 }
             }
         )
@@ -39,11 +214,93 @@ class Algorithm(ColorTransferAlgorithm):
         import cv2
         import numpy as np
     
+    def fit(
+        self,
+        reference: np.ndarray,
+        color_space: str = "lab",
+        stats_subsample: int = 0,
+        **kwargs: Any
+    ) -> ReinhardStats:
+        """
+        Compute the reference statistics used by apply().
+        
+        Fitting once and applying to many sources avoids re-converting and
+        re-measuring the same reference image on every call.
+        
+        Args:
+            reference: Reference image in BGR format
+            color_space: Color space for statistics matching ("lab", "ycrcb" or
+                "lalphabeta")
+            stats_subsample: Approximate per-side size of the grid the statistics are
+                computed on (0 uses every pixel)
+            **kwargs: Additional parameters (ignored)
+            
+        Returns:
+            Reference statistics in the requested color space
+        """
+        # The reference only contributes statistics, so only its sampled pixels
+        # need converting
+        sample = _subsample(reference, stats_subsample)
+        if color_space == "lalphabeta":
+            reference_lab = _bgr_to_lalphabeta(sample)
+        elif color_space in _CVT_CODES:
+            reference_lab = cv2.cvtColor(sample, _CVT_CODES[color_space][0])
+        else:
+            raise AlgorithmError(f"Unsupported color space: {color_space}")
+        
+        mean, std = _mean_std(reference_lab)
+        return ReinhardStats(color_space=color_space, mean=mean, std=std)
+    
+    def apply(
+        self,
+        source: np.ndarray,
+        stats: ReinhardStats,
+        preserve_luminance: bool = False,
+        stats_subsample: int = 0,
+        **kwargs: Any
+    ) -> np.ndarray:
+        """
+        Transfer previously fitted reference statistics onto a source image.
+        
+        Args:
+            source: Source image in BGR format
+            stats: Reference statistics returned by fit()
+            preserve_luminance: Whether to preserve luminance
+            stats_subsample: Approximate per-side size of the grid the source
+                statistics are computed on (0 uses every pixel)
+            **kwargs: Additional parameters (ignored)
+            
+        Returns:
+            Transferred image in BGR format
+        """
+        if stats.color_space == "lalphabeta":
+            return self._apply_lalphabeta(source, stats, preserve_luminance, stats_subsample)
+        code_fwd, code_back = _CVT_CODES[stats.color_space]
+        
+        # Convert to the working color space. The buffer stays uint8:
+        # statistics and the apply pass widen values on the fly.
+        source_lab = cv2.cvtColor(source, code_fwd)
+        source_mean, source_std = _mean_std(_subsample(source_lab, stats_subsample))
+        
+        scale, bias = _scale_bias(
+            source_mean, source_std, stats.mean, stats.std, preserve_luminance
+        )
+        
+        # Apply color transfer, clipping to the valid range
+        result_lab = _apply_affine(source_lab, scale, bias)
+        
+        # Convert back to BGR
+        result = cv2.cvtColor(result_lab, code_back)
+        
+        return result
+    
     def transfer(
         self, 
         source: np.ndarray, 
         reference: np.ndarray, 
         preserve_luminance: bool = False,
+        color_space: str = "lab",
+        stats_subsample: int = 0,
         **kwargs: Any
     ) -> np.ndarray:
         """
@@ -53,48 +310,44 @@ class Algorithm(ColorTransferAlgorithm):
             source: Source image in BGR format
             reference: Reference image in BGR format
             preserve_luminance: Whether to preserve luminance
+            color_space: Color space for statistics matching ("lab", "ycrcb" or
+                "lalphabeta")
+            stats_subsample: Approximate per-side size of the grid the statistics are
+                computed on (0 uses every pixel)
             **kwargs: Additional parameters (ignored)
             
         Returns:
             Transferred image in BGR format
         """
-        # Convert to Lab color space
-        source_lab = cv2.cvtColor(source, cv2.COLOR_BGR2LAB).astype(np.float32)
-        reference_lab = cv2.cvtColor(reference, cv2.COLOR_BGR2LAB).astype(np.float32)
-        
-        # Calculate statistics
-        source_mean = np.mean(source_lab, axis=(0, 1))
-        source_std = np.std(source_lab, axis=(0, 1))
-        reference_mean = np.mean(reference_lab, axis=(0, 1))
-        reference_std = np.std(reference_lab, axis=(0, 1))
-        
-        # Avoid division by zero
-        source_std = np.maximum(source_std, 1e-8)
-        
-        # Apply color transfer
-        result_lab = source_lab.copy()
+        stats = self.fit(reference, color_space=color_space, stats_subsample=stats_subsample)
+        return self.apply(
+            source, stats, preserve_luminance=preserve_luminance, stats_subsample=stats_subsample
+        )
+    
+    def _apply_lalphabeta(
+        self,
+        source: np.ndarray,
+        stats: ReinhardStats,
+        preserve_luminance: bool,
+        stats_subsample: int,
+    ) -> np.ndarray:
+        """Apply the transfer in l-alpha-beta space using matrix products only."""
+        source_lab = _bgr_to_lalphabeta(source)
+        source_mean, source_std = _mean_std(
+            _subsample(source_lab.reshape(source.shape), stats_subsample)
+        )
         
-        if preserve_luminance:
-            # Only transfer a and b channels
-            for i in range(1, 3):
-                result_lab[:, :, i] = (
-                    (source_lab[:, :, i] - source_mean[i]) * 
-                    (reference_std[i] / source_std[i]) + 
-                    reference_mean[i]
-                )
-        else:
-            # Transfer all channels
-            for i in range(3):
-                result_lab[:, :, i] = (
-                    (source_lab[:, :, i] - source_mean[i]) * 
-                    (reference_std[i] / source_std[i]) + 
-                    reference_mean[i]
-                )
+        scale, bias = _scale_bias(
+            source_mean, source_std, stats.mean, stats.std, preserve_luminance
+        )
         
-        # Clip values to valid range
-        result_lab = np.clip(result_lab, 0, 255)
+        # Fold the affine transfer into the inverse transform so that a single
+        # matrix product takes the source from l-alpha-beta back to log(LMS)
+        log_lms = source_lab @ (_LAB_TO_LOG_LMS * scale).T
+        log_lms += _LAB_TO_LOG_LMS @ bias
+        lms = np.power(np.float32(10), log_lms, out=log_lms)
         
-        # Convert back to BGR
-        result = cv2.cvtColor(result_lab.astype(np.uint8), cv2.COLOR_LAB2BGR)
+        result = lms @ _LMS_TO_BGR.T
+        np.clip(result, 0, 255, out=result)
         
-        return result
\ No newline at end of file
+        return result.astype(np.uint8).reshape(source.shape)
\ No newline at end of file
@@ -1,48 +1,120 @@
 """Command-line interface for huehoppy."""
 
+import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, List, Optional
 
 import click
-import cv2
-import numpy as np
-from loguru import logger
-from rich.console import Console
-from rich.table import Table
 
-from .core import HueHoppyManager, Pipeline
+if TYPE_CHECKING:
+    import numpy as np
+    from rich.console import Console
 
-console = Console()
+_console: Optional["Console"] = None
+
+
+def get_console() -> "Console":
+    """Get the shared rich console, creating it on first use."""
+    global _console
+    if _console is None:
+        from rich.console import Console
+        
+        _console = Console()
+    return _console
 
 
 def setup_logging(verbose: bool = False) -> None:
     """Setup logging configuration."""
+    from loguru import logger
+    
     logger.remove()
     level = "DEBUG" if verbose else "INFO"
     logger.add(sys.stderr, level=level, format="<green>{time:HH:mm:ss}</green> | <level>{level}</level> | {message}")
 
 
-def load_image(path: Path) -> np.ndarray:
-    """Load an image file."""
-    if not path.exists():
-        raise click.ClickException(f"Image file not found: {path}")
+def load_image(path: Path, reduce: int = 1) -> 'np.ndarray':
+    """
+    Load an image file.
+    
+    Args:
+        path: Image file path
+        reduce: Downscale factor (1, 2, 4 or 8) applied by the decoder itself,
+            which for JPEG skips most of the full-resolution decode work
+    """
+    import cv2
+    import numpy as np
     
-    image = cv2.imread(str(path))
+    flags = {
+        1: cv2.IMREAD_COLOR,
+        2: cv2.IMREAD_REDUCED_COLOR_2,
+        4: cv2.IMREAD_REDUCED_COLOR_4,
+        8: cv2.IMREAD_REDUCED_COLOR_8,
+    }
+    if reduce not in flags:
+        raise click.ClickException(f"Unsupported reduce factor: {reduce}")
+    
+    # Decoding from memory also handles non-ASCII paths on Windows; the
+    # IMREAD_COLOR family always yields 3-channel BGR uint8
+    try:
+        data = np.fromfile(path, dtype=np.uint8)
+    except FileNotFoundError as e:
+        raise click.ClickException(f"Image file not found: {path}") from e
+    except OSError as e:
+        raise click.ClickException(f"Failed to load image: {path}: {e}") from e
+    
+    image = cv2.imdecode(data, flags[reduce]) if data.size else None
     if image is None:
         raise click.ClickException(f"Failed to load image: {path}")
     
     return image
 
 
-def save_image(image: np.ndarray, path: Path) -> None:
+def load_images(*paths: Path, reduce: int = 1) -> List['np.ndarray']:
+    """Load several image files concurrently (OpenCV releases the GIL while decoding)."""
+    with ThreadPoolExecutor(max_workers=len(paths)) as executor:
+        futures = [executor.submit(load_image, path, reduce) for path in paths]
+        return [future.result() for future in futures]
+
+
+def save_image(image: 'np.ndarray', path: Path) -> None:
     """Save an image file."""
+    import cv2
+    
     path.parent.mkdir(parents=True, exist_ok=True)
     success = cv2.imwrite(str(path), image)
     if not success:
         raise click.ClickException(f"Failed to save image: {path}")
 
 
+def show_preview(image: 'np.ndarray', title: str = "huehoppy preview") -> bool:
+    """
+    Display an image in a window until a key is pressed.
+    
+    Returns:
+        False without showing anything if no GUI is usable here, e.g. with
+        opencv-python-headless or without a display
+    """
+    import cv2
+    
+    # GTK builds exit the process instead of raising when there is no display
+    if sys.platform.startswith("linux") and not (
+        os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY")
+    ):
+        return False
+    
+    try:
+        cv2.namedWindow(title)
+    except cv2.error:
+        return False
+    
+    cv2.imshow(title, image)
+    cv2.waitKey(0)
+    cv2.destroyWindow(title)
+    return True
+
+
 @click.group()
 @click.version_option()
 @click.option("--verbose", "-v", is_flag=True, help="Enable verbose logging")
@@ -58,6 +130,11 @@ def main(ctx: click.Context, verbose: bool) -> None:
 @click.pass_context
 def list_algorithms(ctx: click.Context) -> None:
     """List available color transfer algorithms."""
+    from rich.table import Table
+    
+    from .core import HueHoppyManager
+    
+    console = get_console()
     manager = HueHoppyManager()
     algorithms = manager.get_available_algorithms()
     
@@ -102,23 +179,39 @@ def transfer(
     preview: bool,
 ) -> None:
     """Perform color transfer between two images."""
+    from loguru import logger
+    
+    from .core import HueHoppyManager
+    
     verbose = ctx.obj["verbose"]
+    console = get_console()
     
     try:
-        # Load images
-        console.print(f"Loading source image: {source}")
-        source_img = load_image(source)
-        
-        console.print(f"Loading reference image: {reference}")
-        reference_img = load_image(reference)
-        
         # Initialize manager and perform transfer
         manager = HueHoppyManager()
         
-        if algorithm not in manager.get_available_algorithms():
+        if not manager.is_algorithm_available(algorithm):
             available = ", ".join(manager.get_available_algorithms())
             raise click.ClickException(f"Algorithm '{algorithm}' not available. Available: {available}")
         
+        if preview:
+            # Decode at quarter resolution for a quick look before the full run
+            console.print("Rendering preview...")
+            preview_img = manager.transfer(algorithm, *load_images(source, reference, reduce=4))
+            if show_preview(preview_img):
+                if not click.confirm("Save full-resolution result?", default=True):
+                    console.print("[yellow]Result not saved[/yellow]")
+                    return
+            else:
+                preview_path = output.with_name(f"{output.stem}_preview{output.suffix}")
+                logger.warning(f"No GUI available for preview, saving it to: {preview_path}")
+                save_image(preview_img, preview_path)
+        
+        # Load images
+        console.print(f"Loading source image: {source}")
+        console.print(f"Loading reference image: {reference}")
+        source_img, reference_img = load_images(source, reference)
+        
         console.print(f"Applying {algorithm} algorithm...")
         result = manager.transfer(algorithm, source_img, reference_img)
         
@@ -127,7 +220,9 @@ def transfer(
         save_image(result, output)
         
         console.print("[green]Color transfer completed successfully![/green]")
-        
+    
+    except click.Abort:
+        raise
     except Exception as e:
         logger.error(f"Color transfer failed: {e}")
         raise click.ClickException(str(e))
@@ -149,7 +244,10 @@ def pipeline(
     save_intermediate: bool,
 ) -> None:
     """Execute a color transfer pipeline from configuration file."""
+    from loguru import logger
+    
     verbose = ctx.obj["verbose"]
+    console = get_console()
     
     try:
         # Load images
@@ -161,7 +259,7 @@ def pipeline(
         
         # TODO: Implement pipeline configuration loading
         raise click.ClickException("Pipeline configuration not yet implemented")
-        
+    
     except Exception as e:
         logger.error(f"Pipeline execution failed: {e}")
         raise click.ClickException(str(e))
@@ -1,11 +1,10 @@
 """Base classes and interfaces for color transfer algorithms."""
 
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple, Union
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
 
 import numpy as np
-from pydantic import BaseModel, Field
 
 
 @dataclass
@@ -18,8 +17,8 @@ class AlgorithmMetadata:
     paper: Optional[str] = None
     url: Optional[str] = None
     version: str = "1.0.0"
-    supported_types: List[str] = Field(default_factory=lambda: ["image"])
-    parameters: Dict[str, Any] = Field(default_factory=dict)
+    supported_types: List[str] = field(default_factory=lambda: ["image"])
+    parameters: Dict[str, Any] = field(default_factory=dict)
 
 
 class ColorTransferAlgorithm(ABC):
@@ -56,14 +55,52 @@ class ColorTransferAlgorithm(ABC):
         """
         pass
     
+    def fit(self, reference: np.ndarray, **kwargs: Any) -> Any:
+        """
+        Precompute reference-side state for apply(). Override in subclasses.
+        
+        Algorithms whose reference work is independent of the source (e.g.
+        statistics matching) should override fit() and apply() together so
+        batches can fit a reference once. The default keeps the reference itself.
+        
+        Args:
+            reference: Reference image as numpy array (H, W, C)
+            **kwargs: Additional algorithm-specific parameters
+            
+        Returns:
+            Fitted state to pass to apply()
+        """
+        return reference
+    
+    def apply(self, source: np.ndarray, fitted: Any, **kwargs: Any) -> np.ndarray:
+        """
+        Transfer fitted reference state onto a source image.
+        
+        The default treats the fitted state as the reference and calls transfer().
+        
+        Args:
+            source: Source image as numpy array (H, W, C)
+            fitted: State returned by fit()
+            **kwargs: Additional algorithm-specific parameters
+            
+        Returns:
+            Transferred image as numpy array (H, W, C)
+        """
+        return self.transfer(source, fitted, **kwargs)
+    
     @classmethod
     def is_available(cls) -> bool:
-        """Check if algorithm dependencies are satisfied."""
-        try:
-            cls._check_dependencies()
-            return True
-        except ImportError:
-            return False
+        """Check if algorithm dependencies are satisfied (probed once per class)."""
+        # Look in the class's own namespace so subclasses never inherit the result
+        available = cls.__dict__.get("_available")
+        if available is None:
+            try:
+                cls._check_dependencies()
+                available = True
+            except ImportError:
+                available = False
+            cls._available = available
+        return available
     
     @classmethod
     def _check_dependencies(cls) -> None:
@@ -75,12 +112,18 @@ class ColorTransferAlgorithm(ABC):
         pass
     
     def preprocess(self, image: np.ndarray) -> np.ndarray:
-        """Preprocess input image. Override in subclasses if needed."""
+        """Preprocess input image. The default returns it unchanged; override if needed."""
         return image
     
     def postprocess(self, image: np.ndarray) -> np.ndarray:
         """Postprocess output image. Override in subclasses if needed."""
-        return np.clip(image, 0, 255).astype(np.uint8)
+        if image.dtype == np.uint8:
+            return image
+        
+        # Clip and saturate-cast in one pass, writing straight into the uint8 result
+        result = np.empty(image.shape, dtype=np.uint8)
+        np.clip(image, 0, 255, out=result, casting="unsafe")
+        return result
 
 
 class HueHoppyError(Exception):
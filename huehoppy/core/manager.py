@@ -1,13 +1,37 @@
 """Manager for discovering and loading color transfer algorithms."""
 
 import importlib
-import pkgutil
-from pathlib import Path
-from typing import Dict, List, Optional, Type
+from importlib.metadata import EntryPoint, entry_points
+from typing import Callable, Dict, Iterable, List, Optional, Set, Type
 
+import numpy as np
 from loguru import logger
 
-from .base import ColorTransferAlgorithm, AlgorithmError, DependencyError
+from .base import ColorTransferAlgorithm, AlgorithmError
+
+ENTRY_POINT_GROUP = "huehoppy.algorithms"
+
+# Algorithms shipped with the package, so they are found even when running
+# from a source tree without installed entry points
+BUILTIN_ALGORITHMS: Dict[str, str] = {
+    "reinhard": "huehoppy.algorithms.reinhard:Algorithm",
+}
+
+# Per-process discovery results (algorithm name -> "module:attribute")
+_DISCOVERY_CACHE: Optional[Dict[str, str]] = None
+
+
+def _iter_entry_points(group: str) -> Iterable[EntryPoint]:
+    """
+    Get the entry points registered under a group.
+    
+    ``entry_points()`` only accepts a ``group`` keyword from Python 3.10;
+    earlier versions return a dict of entry points keyed by group.
+    """
+    eps = entry_points()
+    if hasattr(eps, "select"):
+        return eps.select(group=group)
+    return eps.get(group, [])
 
 
 class HueHoppyManager:
@@ -15,69 +39,100 @@ class HueHoppyManager:
     
     def __init__(self) -> None:
         """Initialize the manager and discover available algorithms."""
+        # Algorithm name -> "module:attribute"; modules are imported on first use
+        self._targets: Dict[str, str] = {}
         self._algorithms: Dict[str, Type[ColorTransferAlgorithm]] = {}
+        # Names that failed to load, so they are not imported and reported again
+        self._unavailable: Set[str] = set()
+        # Shared algorithm instances and their bound transfer methods
+        self._instances: Dict[str, ColorTransferAlgorithm] = {}
+        self._dispatch: Dict[str, Callable[..., np.ndarray]] = {}
         self._discover_algorithms()
     
-    def _discover_algorithms(self) -> None:
-        """Discover all available algorithms."""
-        # Get the algorithms directory
-        algorithms_dir = Path(__file__).parent.parent / "algorithms"
+    def _discover_algorithms(self, force: bool = False) -> None:
+        """
+        Discover available algorithms without importing them.
         
-        if not algorithms_dir.exists():
-            logger.warning(f"Algorithms directory not found: {algorithms_dir}")
+        Built-in algorithms are combined with those registered under the
+        ``huehoppy.algorithms`` entry point group, which take precedence.
+        
+        Args:
+            force: Re-read the entry points, ignoring the per-process cache
+        """
+        global _DISCOVERY_CACHE
+        if not force and _DISCOVERY_CACHE is not None:
+            self._targets = dict(_DISCOVERY_CACHE)
             return
         
-        # Search for algorithm modules
-        for item in algorithms_dir.iterdir():
-            if item.is_dir() and (item / "__init__.py").exists():
-                self._load_algorithm(item.name)
+        # Reinstalled plugins may load now, so forget earlier failures
+        self._unavailable.clear()
+        self._targets = dict(BUILTIN_ALGORITHMS)
+        for entry_point in _iter_entry_points(ENTRY_POINT_GROUP):
+            self._targets[entry_point.name] = entry_point.value
+        
+        _DISCOVERY_CACHE = dict(self._targets)
+    
+    def _load_algorithm(self, algorithm_name: str) -> Optional[Type[ColorTransferAlgorithm]]:
+        """Import a single algorithm by name, returning its class if usable."""
+        if algorithm_name in self._algorithms:
+            return self._algorithms[algorithm_name]
+        if algorithm_name in self._unavailable:
+            return None
+        
+        algorithm_class = self._import_algorithm(algorithm_name)
+        if algorithm_class is None:
+            self._unavailable.add(algorithm_name)
+        else:
+            self._algorithms[algorithm_name] = algorithm_class
+        return algorithm_class
     
-    def _load_algorithm(self, algorithm_name: str) -> None:
-        """Load a single algorithm by name."""
+    def _import_algorithm(self, algorithm_name: str) -> Optional[Type[ColorTransferAlgorithm]]:
+        """Import an algorithm class and check its dependencies, logging any failure."""
+        module_name, _, attr_name = self._targets[algorithm_name].partition(":")
         try:
-            module_name = f"huehoppy.algorithms.{algorithm_name}"
             module = importlib.import_module(module_name)
             
-            # Look for algorithm class in the module
-            algorithm_class = getattr(module, "Algorithm", None)
-            if algorithm_class is None:
-                # Try common naming patterns
-                for attr_name in dir(module):
-                    attr = getattr(module, attr_name)
-                    if (
-                        isinstance(attr, type) and
-                        issubclass(attr, ColorTransferAlgorithm) and
-                        attr is not ColorTransferAlgorithm
-                    ):
-                        algorithm_class = attr
-                        break
-            
+            # Targets without an explicit attribute export their class as ``Algorithm``
+            algorithm_class = getattr(module, attr_name or "Algorithm", None)
             if algorithm_class is None:
                 logger.warning(f"No algorithm class found in {module_name}")
-                return
+                return None
             
             # Check if dependencies are available
             if not algorithm_class.is_available():
                 logger.warning(f"Algorithm {algorithm_name} dependencies not available")
-                return
+                return None
             
-            # Register the algorithm
-            self._algorithms[algorithm_name] = algorithm_class
             logger.info(f"Loaded algorithm: {algorithm_name}")
-            
+            return algorithm_class
+        
         except Exception as e:
             logger.warning(f"Failed to load algorithm {algorithm_name}: {e}")
+            return None
+    
+    def get_discovered_algorithms(self) -> List[str]:
+        """Get list of discovered algorithm names, without importing them."""
+        return sorted(self._targets.keys())
     
     def get_available_algorithms(self) -> List[str]:
-        """Get list of available algorithm names."""
-        return sorted(self._algorithms.keys())
+        """Get list of algorithm names that load and have their dependencies installed."""
+        return [
+            name for name in self.get_discovered_algorithms() if self.is_algorithm_available(name)
+        ]
+    
+    def is_algorithm_available(self, name: str) -> bool:
+        """Check whether a single algorithm loads and has its dependencies installed."""
+        return name in self._targets and self._load_algorithm(name) is not None
     
     def get_algorithm(self, name: str) -> ColorTransferAlgorithm:
         """Get an algorithm instance by name."""
-        if name not in self._algorithms:
+        if name not in self._targets:
             raise AlgorithmError(f"Algorithm '{name}' not found")
         
-        algorithm_class = self._algorithms[name]
+        algorithm_class = self._load_algorithm(name)
+        if algorithm_class is None:
+            raise AlgorithmError(f"Algorithm '{name}' could not be loaded")
+        
         try:
             return algorithm_class()
         except Exception as e:
@@ -85,23 +140,42 @@ class HueHoppyManager:
     
     def get_algorithm_metadata(self, name: str) -> Optional[object]:
         """Get metadata for an algorithm."""
-        if name not in self._algorithms:
+        if name not in self._targets:
+            return None
+        
+        algorithm_class = self._load_algorithm(name)
+        if algorithm_class is None:
             return None
         
-        algorithm_class = self._algorithms[name]
         try:
             return algorithm_class.get_metadata()
         except Exception as e:
             logger.warning(f"Failed to get metadata for {name}: {e}")
             return None
     
+    def get_shared_algorithm(self, name: str) -> ColorTransferAlgorithm:
+        """Get the algorithm instance this manager reuses for the given name."""
+        algorithm = self._instances.get(name)
+        if algorithm is None:
+            algorithm = self.get_algorithm(name)
+            self._instances[name] = algorithm
+        return algorithm
+    
+    def get_transfer(self, name: str) -> Callable[..., np.ndarray]:
+        """Get the transfer method of a shared algorithm instance by name."""
+        transfer_fn = self._dispatch.get(name)
+        if transfer_fn is None:
+            transfer_fn = self.get_shared_algorithm(name).transfer
+            self._dispatch[name] = transfer_fn
+        return transfer_fn
+    
     def transfer(
         self, 
         algorithm_name: str, 
-        source: 'np.ndarray', 
-        reference: 'np.ndarray', 
+        source: np.ndarray, 
+        reference: np.ndarray, 
         **kwargs
-    ) -> 'np.ndarray':
+    ) -> np.ndarray:
         """
         Perform color transfer using specified algorithm.
         
@@ -114,5 +188,4 @@ class HueHoppyManager:
         Returns:
             Transferred image
         """
-        algorithm = self.get_algorithm(algorithm_name)
-        return algorithm.transfer(source, reference, **kwargs)
\ No newline at end of file
+        return self.get_transfer(algorithm_name)(source, reference, **kwargs)
\ No newline at end of file
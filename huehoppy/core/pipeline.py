@@ -1,17 +1,19 @@
 """Pipeline system for chaining color transfer algorithms."""
 
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import numpy as np
 from loguru import logger
 
-from .base import ColorTransferAlgorithm, AlgorithmError
+from .base import AlgorithmError
 from .manager import HueHoppyManager
 
 
 class PipelineStep:
     """Represents a single step in a color transfer pipeline."""
     
+    __slots__ = ("algorithm_name", "parameters")
+    
     def __init__(self, algorithm_name: str, parameters: Optional[Dict[str, Any]] = None):
         """Initialize a pipeline step."""
         self.algorithm_name = algorithm_name
@@ -24,6 +26,8 @@ class PipelineStep:
 class Pipeline:
     """Pipeline for chaining multiple color transfer algorithms."""
     
+    __slots__ = ("manager", "steps", "_results")
+    
     def __init__(self, manager: Optional[HueHoppyManager] = None):
         """Initialize the pipeline."""
         self.manager = manager or HueHoppyManager()
@@ -62,33 +66,95 @@ class Pipeline:
         if not self.steps:
             raise AlgorithmError("Pipeline is empty")
         
-        current_image = source.copy()
+        # Resolve every step up front, so a bad algorithm name fails before
+        # any image work; the manager shares one instance per name
+        resolved = []
+        for i, step in enumerate(self.steps):
+            try:
+                transfer_fn = self.manager.get_transfer(step.algorithm_name)
+            except Exception as e:
+                raise AlgorithmError(f"Step {i+1} failed: {e}")
+            resolved.append((step.algorithm_name, transfer_fn, step.parameters))
+        
+        # Algorithms return a new array and never modify their inputs, so the
+        # source only needs copying when it is kept as an intermediate result
+        current_image = source
         
         if save_intermediate:
-            self._results = [current_image.copy()]
+            self._results = [source.copy()]
+        append_result = self._results.append
         
-        for i, step in enumerate(self.steps):
-            logger.info(f"Executing step {i+1}/{len(self.steps)}: {step.algorithm_name}")
+        n_steps = len(resolved)
+        for i, (algorithm_name, transfer_fn, parameters) in enumerate(resolved):
+            # Arguments are only formatted if a sink accepts INFO messages
+            logger.info("Executing step {}/{}: {}", i + 1, n_steps, algorithm_name)
             
             try:
-                algorithm = self.manager.get_algorithm(step.algorithm_name)
-                current_image = algorithm.transfer(
-                    current_image, 
-                    reference, 
-                    **step.parameters
-                )
+                current_image = transfer_fn(current_image, reference, **parameters)
                 
                 if save_intermediate:
-                    self._results.append(current_image.copy())
-                    
+                    append_result(current_image)
+            
             except Exception as e:
                 raise AlgorithmError(f"Step {i+1} failed: {e}")
         
         return current_image
     
-    def get_intermediate_results(self) -> List[np.ndarray]:
-        """Get intermediate results from the last execution."""
-        return self._results.copy()
+    def execute_batch(
+        self, 
+        sources: Iterable[np.ndarray], 
+        reference: np.ndarray
+    ) -> List[np.ndarray]:
+        """
+        Execute the pipeline on several source images with one reference.
+        
+        Each step fits the reference once, then applies the fitted state to
+        every source, instead of redoing the reference work per image.
+        
+        Args:
+            sources: Source images (a sequence, or an array of shape (N, H, W, C))
+            reference: Reference image
+            
+        Returns:
+            Final processed image for each source, in order
+        """
+        if not self.steps:
+            raise AlgorithmError("Pipeline is empty")
+        
+        fitted_steps = []
+        for i, step in enumerate(self.steps):
+            logger.info("Fitting step {}/{}: {}", i + 1, len(self.steps), step.algorithm_name)
+            try:
+                algorithm = self.manager.get_shared_algorithm(step.algorithm_name)
+                fitted = algorithm.fit(reference, **step.parameters)
+            except Exception as e:
+                raise AlgorithmError(f"Step {i+1} failed: {e}")
+            fitted_steps.append((algorithm.apply, fitted, step.parameters))
+        
+        results = []
+        for source in sources:
+            current_image = source
+            for i, (apply_fn, fitted, parameters) in enumerate(fitted_steps):
+                try:
+                    current_image = apply_fn(current_image, fitted, **parameters)
+                except Exception as e:
+                    raise AlgorithmError(f"Step {i+1} failed: {e}")
+            results.append(current_image)
+        
+        return results
+    
+    def get_intermediate_results(self) -> Tuple[np.ndarray, ...]:
+        """
+        Get intermediate results from the last execution.
+        
+        The last entry is the same array that execute() returned.
+        """
+        return tuple(self._results)
+    
+    def clear_intermediate_results(self) -> 'Pipeline':
+        """Release intermediate results kept from the last execution."""
+        self._results.clear()
+        return self
     
     def __len__(self) -> int:
         """Get the number of steps in the pipeline."""
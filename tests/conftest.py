@@ -3,55 +3,104 @@
 import numpy as np
 import pytest
 import cv2
+from click.testing import CliRunner
 from pathlib import Path
 
+from huehoppy.algorithms.reinhard import Algorithm as ReinhardAlgorithm
+from huehoppy.core.manager import HueHoppyManager
+
+# Fixture files only need to be lossless, so skip deflate when writing them
+PNG_UNCOMPRESSED = [cv2.IMWRITE_PNG_COMPRESSION, 0]
+
 
 @pytest.fixture
+def runner():
+    """Create a click test runner for CLI invocations."""
+    return CliRunner()
+
+
+@pytest.fixture(scope="session")
+def manager():
+    """Create a manager shared by the whole test session."""
+    return HueHoppyManager()
+
+
+@pytest.fixture(scope="session")
+def available_algorithms(manager):
+    """Snapshot the algorithm names discovered by the shared manager."""
+    return tuple(manager.get_available_algorithms())
+
+
+@pytest.fixture(scope="session")
+def reinhard():
+    """Create a Reinhard algorithm instance shared by the whole test session."""
+    return ReinhardAlgorithm()
+
+
+@pytest.fixture(scope="session")
+def reference_stats(reinhard, sample_reference):
+    """Fit the Reinhard reference statistics of sample_reference once per session."""
+    return reinhard.fit(sample_reference)
+
+
+@pytest.fixture
+def reinhard_mock(monkeypatch):
+    """Replace Reinhard's transfer with a copy, for tests of plumbing rather than math."""
+    monkeypatch.setattr(
+        ReinhardAlgorithm, "transfer", lambda self, source, reference, **kwargs: source.copy()
+    )
+
+
+@pytest.fixture(scope="session")
 def sample_image():
-    """Create a sample test image."""
+    """Create a sample test image, shared read-only by the whole session."""
     # Create a simple 100x100 RGB image with gradient
     height, width = 100, 100
     image = np.zeros((height, width, 3), dtype=np.uint8)
     
     # Create a gradient pattern
-    for i in range(height):
-        for j in range(width):
-            image[i, j] = [i * 255 // height, j * 255 // width, 128]
+    i, j = np.mgrid[:height, :width]
+    image[..., 0] = i * 255 // height
+    image[..., 1] = j * 255 // width
+    image[..., 2] = 128
+    image.flags.writeable = False
     
     return image
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_reference():
-    """Create a sample reference image."""
+    """Create a sample reference image, shared read-only by the whole session."""
     # Create a different 100x100 RGB image
     height, width = 100, 100
     image = np.zeros((height, width, 3), dtype=np.uint8)
     
     # Create a different pattern
-    for i in range(height):
-        for j in range(width):
-            image[i, j] = [128, (i + j) * 255 // (height + width), 200]
+    i, j = np.mgrid[:height, :width]
+    image[..., 0] = 128
+    image[..., 1] = (i + j) * 255 // (height + width)
+    image[..., 2] = 200
+    image.flags.writeable = False
     
     return image
 
 
-@pytest.fixture
-def temp_image_path(tmp_path):
+@pytest.fixture(scope="session")
+def temp_image_path(tmp_path_factory):
     """Create a temporary image file path."""
-    return tmp_path / "test_image.png"
+    return tmp_path_factory.mktemp("images") / "test_image.png"
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_image_file(sample_image, temp_image_path):
     """Create a sample image file."""
-    cv2.imwrite(str(temp_image_path), sample_image)
+    cv2.imwrite(str(temp_image_path), sample_image, PNG_UNCOMPRESSED)
     return temp_image_path
 
 
-@pytest.fixture
-def sample_reference_file(sample_reference, tmp_path):
+@pytest.fixture(scope="session")
+def sample_reference_file(sample_reference, tmp_path_factory):
     """Create a sample reference image file."""
-    ref_path = tmp_path / "reference.png"
-    cv2.imwrite(str(ref_path), sample_reference)
+    ref_path = tmp_path_factory.mktemp("images") / "reference.png"
+    cv2.imwrite(str(ref_path), sample_reference, PNG_UNCOMPRESSED)
     return ref_path
\ No newline at end of file
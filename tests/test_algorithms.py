@@ -1,10 +1,15 @@
 """Tests for color transfer algorithms."""
 
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
 import numpy as np
 import pytest
 
-from huehoppy.algorithms.reinhard import Algorithm as ReinhardAlgorithm
-from huehoppy.core.base import AlgorithmMetadata
+from huehoppy.algorithms.reinhard import Algorithm as ReinhardAlgorithm, ReinhardStats
+from huehoppy.core.base import AlgorithmMetadata, AlgorithmError
 
 
 class TestReinhardAlgorithm:
@@ -24,68 +29,161 @@ class TestReinhardAlgorithm:
         assert "2001" in metadata.paper
         assert metadata.supported_types == ["image"]
     
-    def test_algorithm_availability(self):
-        """Test that algorithm is available."""
-        assert ReinhardAlgorithm.is_available() is True
-    
-    def test_dependencies_check(self):
-        """Test dependencies check."""
+    def test_availability_and_deps(self):
+        """Test that algorithm dependencies are satisfied."""
         # Should not raise exception
         ReinhardAlgorithm._check_dependencies()
+        assert ReinhardAlgorithm.is_available() is True
     
-    def test_basic_transfer(self, sample_image, sample_reference):
+    def test_basic_transfer(self, reinhard, sample_image, sample_reference):
         """Test basic color transfer."""
-        algorithm = ReinhardAlgorithm()
-        result = algorithm.transfer(sample_image, sample_reference)
+        result = reinhard.transfer(sample_image, sample_reference)
         
         assert isinstance(result, np.ndarray)
         assert result.shape == sample_image.shape
-        assert result.dtype == np.uint8
-        assert np.all(result >= 0)
-        assert np.all(result <= 255)
+        assert result.dtype == np.uint8  # uint8 values are always within [0, 255]
     
-    def test_transfer_with_luminance_preservation(self, sample_image, sample_reference):
+    def test_transfer_with_luminance_preservation(self, reinhard, sample_image, reference_stats):
         """Test color transfer with luminance preservation."""
-        algorithm = ReinhardAlgorithm()
-        result = algorithm.transfer(sample_image, sample_reference, preserve_luminance=True)
+        result = reinhard.apply(sample_image, reference_stats, preserve_luminance=True)
         
         assert isinstance(result, np.ndarray)
         assert result.shape == sample_image.shape
         assert result.dtype == np.uint8
     
-    def test_transfer_different_sizes(self):
-        """Test transfer with different image sizes."""
-        algorithm = ReinhardAlgorithm()
+    def test_transfer_lalphabeta_color_space(self, reinhard, sample_image, sample_reference):
+        """Test color transfer in the l-alpha-beta color space."""
+        result = reinhard.transfer(sample_image, sample_reference, color_space="lalphabeta")
         
-        # Create images of different sizes
-        small_img = np.random.randint(0, 255, (50, 50, 3), dtype=np.uint8)
-        large_img = np.random.randint(0, 255, (200, 200, 3), dtype=np.uint8)
+        assert isinstance(result, np.ndarray)
+        assert result.shape == sample_image.shape
+        assert result.dtype == np.uint8
+        
+        # Transferring an image onto itself should be close to identity
+        identity = reinhard.transfer(sample_image, sample_image, color_space="lalphabeta")
+        assert np.abs(identity.astype(np.int16) - sample_image).max() <= 2
+    
+    def test_transfer_with_stats_subsample(self, reinhard, sample_image, sample_reference):
+        """Test that subsampled statistics closely match full-resolution ones."""
+        full = reinhard.transfer(sample_image, sample_reference)
+        sampled = reinhard.transfer(sample_image, sample_reference, stats_subsample=50)
+        
+        assert sampled.shape == sample_image.shape
+        assert sampled.dtype == np.uint8
+        assert np.abs(sampled.astype(np.int16) - full).mean() < 2
+    
+    def test_transfer_without_numba(self, reinhard, sample_image, reference_stats, monkeypatch):
+        """Test that the NumPy fallback matches the compiled affine kernel exactly."""
+        from huehoppy.algorithms.reinhard import algorithm as reinhard_module
+        
+        if reinhard_module._get_affine_kernel() is None:
+            pytest.skip("numba is not installed")
+        
+        # Route even the small sample image through the compiled kernel
+        monkeypatch.setattr(reinhard_module, "_KERNEL_MIN_PIXELS", 0)
+        expected = reinhard.apply(sample_image, reference_stats)
+        
+        monkeypatch.setattr(reinhard_module, "_get_affine_kernel", lambda: None)
+        result = reinhard.apply(sample_image, reference_stats)
+        
+        assert result.dtype == np.uint8
+        assert np.array_equal(result, expected)
+    
+    def test_small_transfer_does_not_import_numba(self):
+        """Test that images below the kernel threshold never import numba."""
+        code = (
+            "import sys, numpy as np; "
+            "from huehoppy.algorithms.reinhard import Algorithm; "
+            "image = np.zeros((64, 64, 3), np.uint8); "
+            "Algorithm().transfer(image, image); "
+            "print('numba' in sys.modules)"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            cwd=Path(__file__).parent.parent,
+            check=True,
+        )
+        assert result.stdout.split() == ["False"]
+    
+    @pytest.mark.parametrize("kernel_min_pixels", [0, None], ids=["numba", "numpy"])
+    def test_concurrent_transfer(
+        self, reinhard, sample_image, sample_reference, monkeypatch, kernel_min_pixels
+    ):
+        """Test that transfers running on several threads at once agree."""
+        from huehoppy.algorithms.reinhard import algorithm as reinhard_module
         
-        result = algorithm.transfer(small_img, large_img)
+        if kernel_min_pixels is not None:
+            monkeypatch.setattr(reinhard_module, "_KERNEL_MIN_PIXELS", kernel_min_pixels)
+        expected = reinhard.transfer(sample_image, sample_reference)
+        
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(
+                lambda _: reinhard.transfer(sample_image, sample_reference), range(16)
+            ))
+        
+        assert all(np.array_equal(result, expected) for result in results)
+    
+    def test_transfer_ycrcb_color_space(self, reinhard, sample_image, sample_reference):
+        """Test color transfer in the YCrCb color space."""
+        result = reinhard.transfer(sample_image, sample_reference, color_space="ycrcb")
+        
+        assert isinstance(result, np.ndarray)
+        assert result.shape == sample_image.shape
+        assert result.dtype == np.uint8
+        assert not np.array_equal(result, reinhard.transfer(sample_image, sample_reference))
+    
+    @pytest.mark.parametrize("color_space", ["lab", "ycrcb", "lalphabeta"])
+    def test_fit_apply_matches_transfer(
+        self, reinhard, sample_image, sample_reference, color_space
+    ):
+        """Test that fitting the reference once gives the same result as transfer."""
+        stats = reinhard.fit(sample_reference, color_space=color_space)
+        
+        assert isinstance(stats, ReinhardStats)
+        assert stats.color_space == color_space
+        assert stats.mean.shape == (3,)
+        assert stats.std.shape == (3,)
+        
+        expected = reinhard.transfer(sample_image, sample_reference, color_space=color_space)
+        assert np.array_equal(reinhard.apply(sample_image, stats), expected)
+    
+    def test_transfer_invalid_color_space(self, reinhard, sample_image, sample_reference):
+        """Test that unknown color spaces are rejected."""
+        with pytest.raises(AlgorithmError):
+            reinhard.transfer(sample_image, sample_reference, color_space="nonexistent")
+    
+    def test_transfer_different_sizes(self, reinhard):
+        """Test transfer with different image sizes."""
+        # Create images of different (non-square) sizes
+        rng = np.random.default_rng(0)
+        small_img = rng.integers(0, 256, (32, 48, 3), dtype=np.uint8)
+        large_img = rng.integers(0, 256, (64, 40, 3), dtype=np.uint8)
+        
+        result = reinhard.transfer(small_img, large_img)
         assert result.shape == small_img.shape
         
-        result = algorithm.transfer(large_img, small_img)
+        result = reinhard.transfer(large_img, small_img)
         assert result.shape == large_img.shape
     
-    def test_transfer_edge_cases(self):
+    def test_transfer_edge_cases(self, reinhard):
         """Test transfer with edge cases."""
-        algorithm = ReinhardAlgorithm()
-        
-        # Test with uniform color images
-        uniform_img = np.full((100, 100, 3), 128, dtype=np.uint8)
-        result = algorithm.transfer(uniform_img, uniform_img)
-        assert isinstance(result, np.ndarray)
+        # Test with uniform color images: zero variance on both sides leaves
+        # only the mean shift, which is zero here
+        uniform_img = np.full((8, 8, 3), 128, dtype=np.uint8)
+        result = reinhard.transfer(uniform_img, uniform_img)
+        assert np.array_equal(result, uniform_img)
         
-        # Test with extreme values
-        black_img = np.zeros((100, 100, 3), dtype=np.uint8)
-        white_img = np.full((100, 100, 3), 255, dtype=np.uint8)
-        result = algorithm.transfer(black_img, white_img)
-        assert isinstance(result, np.ndarray)
+        # Test with extreme values: a flat source takes on the flat reference color
+        black_img = np.zeros((8, 8, 3), dtype=np.uint8)
+        white_img = np.full((8, 8, 3), 255, dtype=np.uint8)
+        result = reinhard.transfer(black_img, white_img)
+        assert np.array_equal(result, white_img)
     
-    def test_algorithm_parameters(self):
+    def test_algorithm_parameters(self, reinhard):
         """Test algorithm parameter handling."""
-        algorithm = ReinhardAlgorithm()
-        metadata = algorithm.get_metadata()
+        metadata = reinhard.get_metadata()
         
         # Check that parameters are documented
         assert "preserve_luminance" in metadata.parameters
@@ -93,16 +191,17 @@ class TestReinhardAlgorithm:
         assert param_info["type"] == "bool"
         assert param_info["default"] is False
     
-    def test_preprocess_postprocess(self, sample_image):
+    def test_preprocess_postprocess(self, reinhard, sample_image):
         """Test preprocessing and postprocessing."""
-        algorithm = ReinhardAlgorithm()
-        
-        # Test preprocessing (should be identity by default)
-        preprocessed = algorithm.preprocess(sample_image)
-        assert np.array_equal(preprocessed, sample_image)
+        # Test preprocessing (returns the input itself by default)
+        preprocessed = reinhard.preprocess(sample_image)
+        assert preprocessed is sample_image
         
         # Test postprocessing (should clip and convert to uint8)
         test_array = np.array([[-10, 128, 300]], dtype=np.float32)
-        postprocessed = algorithm.postprocess(test_array)
+        postprocessed = reinhard.postprocess(test_array)
         assert np.array_equal(postprocessed, [[0, 128, 255]])
-        assert postprocessed.dtype == np.uint8
\ No newline at end of file
+        assert postprocessed.dtype == np.uint8
+        
+        # uint8 input is already in range and is passed through unchanged
+        assert reinhard.postprocess(sample_image) is sample_image
\ No newline at end of file
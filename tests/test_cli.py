@@ -1,42 +1,58 @@
 """Tests for CLI functionality."""
 
 import pytest
-from click.testing import CliRunner
+import click
 import tempfile
+import subprocess
+import sys
+from importlib.metadata import EntryPoint
+from pathlib import Path
 import cv2
 import numpy as np
 
-from huehoppy.cli import main
+from huehoppy.cli import load_image, load_images, main
+from huehoppy.core.manager import ENTRY_POINT_GROUP
 
 
 class TestCLI:
     """Tests for command-line interface."""
     
-    def test_main_help(self):
+    def test_main_help(self, runner):
         """Test main help command."""
-        runner = CliRunner()
         result = runner.invoke(main, ["--help"])
         assert result.exit_code == 0
         assert "huehoppy: Advanced Color Transfer Tool" in result.output
     
-    def test_list_algorithms(self):
+    def test_list_algorithms(self, runner):
         """Test list-algorithms command."""
-        runner = CliRunner()
         result = runner.invoke(main, ["list-algorithms"])
         assert result.exit_code == 0
         assert "Available Color Transfer Algorithms" in result.output
         assert "reinhard" in result.output.lower()
     
-    def test_transfer_command_help(self):
+    def test_list_algorithms_skips_unusable(self, runner, monkeypatch):
+        """Test that list-algorithms leaves out algorithms that fail to load."""
+        broken = EntryPoint(
+            name="broken", value="huehoppy_missing_module:Algorithm", group=ENTRY_POINT_GROUP
+        )
+        monkeypatch.setattr("huehoppy.core.manager._DISCOVERY_CACHE", None)
+        monkeypatch.setattr(
+            "huehoppy.core.manager.entry_points", lambda: {ENTRY_POINT_GROUP: [broken]}
+        )
+        
+        result = runner.invoke(main, ["list-algorithms"])
+        assert result.exit_code == 0
+        assert "reinhard" in result.output.lower()
+        assert "broken" not in result.stdout
+    
+    def test_transfer_command_help(self, runner):
         """Test transfer command help."""
-        runner = CliRunner()
         result = runner.invoke(main, ["transfer", "--help"])
         assert result.exit_code == 0
         assert "Perform color transfer between two images" in result.output
     
-    def test_transfer_missing_files(self):
+    def test_transfer_missing_files(self, runner):
         """Test transfer with missing files."""
-        runner = CliRunner()
         result = runner.invoke(main, [
             "transfer", 
             "nonexistent_source.jpg",
@@ -45,11 +61,10 @@ class TestCLI:
         ])
         assert result.exit_code != 0
     
-    def test_transfer_success(self, sample_image_file, sample_reference_file, tmp_path):
+    def test_transfer_success(self, runner, sample_image_file, sample_reference_file, tmp_path):
         """Test successful color transfer."""
         output_path = tmp_path / "output.jpg"
         
-        runner = CliRunner()
         result = runner.invoke(main, [
             "transfer",
             str(sample_image_file),
@@ -68,11 +83,12 @@ class TestCLI:
         assert output_img.shape[1] > 0
         assert output_img.shape[2] == 3
     
-    def test_transfer_invalid_algorithm(self, sample_image_file, sample_reference_file, tmp_path):
+    def test_transfer_invalid_algorithm(
+        self, runner, sample_image_file, sample_reference_file, tmp_path
+    ):
         """Test transfer with invalid algorithm."""
         output_path = tmp_path / "output.jpg"
         
-        runner = CliRunner()
         result = runner.invoke(main, [
             "transfer",
             str(sample_image_file),
@@ -84,11 +100,12 @@ class TestCLI:
         assert result.exit_code != 0
         assert "not available" in result.output
     
-    def test_verbose_flag(self, sample_image_file, sample_reference_file, tmp_path):
+    def test_verbose_flag(
+        self, runner, reinhard_mock, sample_image_file, sample_reference_file, tmp_path
+    ):
         """Test verbose flag."""
         output_path = tmp_path / "output.jpg"
         
-        runner = CliRunner()
         result = runner.invoke(main, [
             "--verbose",
             "transfer",
@@ -100,14 +117,139 @@ class TestCLI:
         assert result.exit_code == 0
         assert output_path.exists()
     
-    def test_pipeline_command_help(self):
+    def test_transfer_preview(
+        self, runner, reinhard_mock, sample_image_file, sample_reference_file, tmp_path, monkeypatch
+    ):
+        """Test that --preview shows a reduced-resolution result before saving."""
+        output_path = tmp_path / "output.png"
+        shown = []
+        monkeypatch.setattr("huehoppy.cli.show_preview", lambda image: shown.append(image) or True)
+        
+        result = runner.invoke(main, [
+            "transfer",
+            str(sample_image_file),
+            str(sample_reference_file),
+            str(output_path),
+            "--preview",
+        ], input="y\n")
+        
+        assert result.exit_code == 0
+        assert len(shown) == 1
+        assert shown[0].shape == (25, 25, 3)
+        assert cv2.imread(str(output_path)).shape == (100, 100, 3)
+    
+    def test_transfer_preview_declined(
+        self, runner, reinhard_mock, sample_image_file, sample_reference_file, tmp_path, monkeypatch
+    ):
+        """Test that declining the preview leaves no output file."""
+        output_path = tmp_path / "output.png"
+        monkeypatch.setattr("huehoppy.cli.show_preview", lambda image: True)
+        
+        result = runner.invoke(main, [
+            "transfer",
+            str(sample_image_file),
+            str(sample_reference_file),
+            str(output_path),
+            "--preview",
+        ], input="n\n")
+        
+        assert result.exit_code == 0
+        assert not output_path.exists()
+    
+    @pytest.mark.skipif(
+        not sys.platform.startswith("linux"), reason="display detection is Linux-only"
+    )
+    def test_transfer_preview_headless(
+        self, runner, reinhard_mock, sample_image_file, sample_reference_file, tmp_path, monkeypatch
+    ):
+        """Test that --preview without a display saves the preview file instead of prompting."""
+        output_path = tmp_path / "output.png"
+        monkeypatch.delenv("DISPLAY", raising=False)
+        monkeypatch.delenv("WAYLAND_DISPLAY", raising=False)
+        
+        result = runner.invoke(main, [
+            "transfer",
+            str(sample_image_file),
+            str(sample_reference_file),
+            str(output_path),
+            "--preview",
+        ])
+        
+        assert result.exit_code == 0
+        assert cv2.imread(str(tmp_path / "output_preview.png")).shape == (25, 25, 3)
+        assert cv2.imread(str(output_path)).shape == (100, 100, 3)
+    
+    def test_transfer_preview_aborted(
+        self, runner, reinhard_mock, sample_image_file, sample_reference_file, tmp_path, monkeypatch
+    ):
+        """Test that aborting the confirmation prompt is not reported as a failure."""
+        output_path = tmp_path / "output.png"
+        monkeypatch.setattr("huehoppy.cli.show_preview", lambda image: True)
+        
+        result = runner.invoke(main, [
+            "transfer",
+            str(sample_image_file),
+            str(sample_reference_file),
+            str(output_path),
+            "--preview",
+        ])
+        
+        assert result.exit_code == 1
+        assert "Aborted!" in result.output
+        assert "Color transfer failed" not in result.output
+        assert not output_path.exists()
+    
+    def test_load_image_reduced(self, sample_image_file):
+        """Test decoder-side downscaling in load_image."""
+        assert load_image(sample_image_file).shape == (100, 100, 3)
+        assert load_image(sample_image_file, reduce=2).shape == (50, 50, 3)
+        
+        with pytest.raises(click.ClickException):
+            load_image(sample_image_file, reduce=3)
+    
+    def test_load_image_errors(self, tmp_path):
+        """Test error messages for missing and undecodable files."""
+        with pytest.raises(click.ClickException, match="not found"):
+            load_image(tmp_path / "missing.png")
+        
+        broken_path = tmp_path / "broken.png"
+        broken_path.write_bytes(b"not an image")
+        with pytest.raises(click.ClickException, match="Failed to load"):
+            load_image(broken_path)
+        
+        empty_path = tmp_path / "empty.png"
+        empty_path.write_bytes(b"")
+        with pytest.raises(click.ClickException, match="Failed to load"):
+            load_image(empty_path)
+    
+    def test_load_image_grayscale_as_bgr(self, tmp_path):
+        """Test that single-channel files are decoded to 3-channel BGR."""
+        gray_path = tmp_path / "gray.png"
+        cv2.imwrite(str(gray_path), np.full((10, 20), 77, dtype=np.uint8))
+        
+        image = load_image(gray_path)
+        assert image.shape == (10, 20, 3)
+        assert image.dtype == np.uint8
+    
+    def test_load_images_preserves_order(
+        self, sample_image, sample_reference, sample_image_file, sample_reference_file
+    ):
+        """Test that concurrently loaded images come back in argument order."""
+        source_img, reference_img = load_images(sample_image_file, sample_reference_file)
+        
+        # PNG is lossless, so the decoded files match the in-memory fixtures
+        assert np.array_equal(source_img, sample_image)
+        assert np.array_equal(reference_img, sample_reference)
+    
+    def test_pipeline_command_help(self, runner):
         """Test pipeline command help."""
-        runner = CliRunner()
         result = runner.invoke(main, ["pipeline", "--help"])
         assert result.exit_code == 0
         assert "Execute a color transfer pipeline" in result.output
     
-    def test_pipeline_not_implemented(self, sample_image_file, sample_reference_file, tmp_path):
+    def test_pipeline_not_implemented(
+        self, runner, sample_image_file, sample_reference_file, tmp_path
+    ):
         """Test that pipeline is not yet implemented."""
         config_path = tmp_path / "config.json"
         output_path = tmp_path / "output.jpg"
@@ -115,7 +257,6 @@ class TestCLI:
         # Create dummy config file
         config_path.write_text('{"steps": []}')
         
-        runner = CliRunner()
         result = runner.invoke(main, [
             "pipeline",
             str(config_path),
@@ -125,4 +266,22 @@ class TestCLI:
         ])
         
         assert result.exit_code != 0
-        assert "not yet implemented" in result.output
\ No newline at end of file
+        assert "not yet implemented" in result.output
+    
+    def test_package_import_is_lazy(self):
+        """Test that importing the package does not pull in the CLI or core."""
+        code = (
+            "import sys, huehoppy; "
+            "print('huehoppy.cli' in sys.modules, 'huehoppy.core' in sys.modules)"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            cwd=Path(__file__).parent.parent,
+            check=True,
+        )
+        assert result.stdout.split() == ["False", "False"]
+        
+        import huehoppy
+        assert huehoppy.cli_main is main
\ No newline at end of file
@@ -1,10 +1,14 @@
 """Tests for core huehoppy functionality."""
 
+import importlib.metadata
+from importlib.metadata import EntryPoint
+
 import numpy as np
 import pytest
+from loguru import logger
 
-from huehoppy.core.base import ColorTransferAlgorithm, AlgorithmMetadata
-from huehoppy.core.manager import HueHoppyManager
+from huehoppy.core.base import ColorTransferAlgorithm, AlgorithmError, AlgorithmMetadata
+from huehoppy.core.manager import ENTRY_POINT_GROUP, HueHoppyManager, _iter_entry_points
 from huehoppy.core.pipeline import Pipeline, PipelineStep
 
 
@@ -29,6 +33,45 @@ class TestColorTransferAlgorithm:
         assert metadata.author == "Test Author"
         assert metadata.version == "1.0.0"
         assert metadata.supported_types == ["image"]
+        assert metadata.parameters == {}
+    
+    def test_algorithm_metadata_defaults_not_shared(self):
+        """Test that each AlgorithmMetadata gets its own default containers."""
+        first = AlgorithmMetadata(name="A", description="A", author="A")
+        second = AlgorithmMetadata(name="B", description="B", author="B")
+        
+        first.supported_types.append("video")
+        first.parameters["strength"] = {"type": "float"}
+        
+        assert second.supported_types == ["image"]
+        assert second.parameters == {}
+    
+    def test_is_available_probes_once(self):
+        """Test that the dependency probe runs once per class and is not inherited."""
+        probes = []
+        
+        class Unavailable(ColorTransferAlgorithm):
+            @classmethod
+            def get_metadata(cls):
+                return AlgorithmMetadata(name="U", description="U", author="U")
+            
+            def transfer(self, source, reference, **kwargs):
+                return source
+            
+            @classmethod
+            def _check_dependencies(cls):
+                probes.append(cls)
+                raise ImportError("missing")
+        
+        class Available(Unavailable):
+            @classmethod
+            def _check_dependencies(cls):
+                probes.append(cls)
+        
+        assert Unavailable.is_available() is False
+        assert Unavailable.is_available() is False
+        assert Available.is_available() is True
+        assert probes == [Unavailable, Available]
 
 
 class TestHueHoppyManager:
@@ -39,32 +82,145 @@ class TestHueHoppyManager:
         manager = HueHoppyManager()
         assert isinstance(manager, HueHoppyManager)
     
-    def test_get_available_algorithms(self):
+    def test_get_available_algorithms(self, manager):
         """Test getting available algorithms."""
-        manager = HueHoppyManager()
         algorithms = manager.get_available_algorithms()
         assert isinstance(algorithms, list)
         # Should contain at least the reinhard algorithm
         assert "reinhard" in algorithms
     
-    def test_get_algorithm(self):
+    def test_get_algorithm(self, manager):
         """Test getting algorithm instance."""
-        manager = HueHoppyManager()
         algorithm = manager.get_algorithm("reinhard")
         assert isinstance(algorithm, ColorTransferAlgorithm)
     
-    def test_get_nonexistent_algorithm(self):
+    def test_get_nonexistent_algorithm(self, manager):
         """Test getting non-existent algorithm."""
-        manager = HueHoppyManager()
         with pytest.raises(Exception):
             manager.get_algorithm("nonexistent")
     
-    def test_transfer_method(self, sample_image, sample_reference):
+    def test_transfer_method(self, manager, sample_image, sample_reference):
         """Test the transfer method."""
-        manager = HueHoppyManager()
         result = manager.transfer("reinhard", sample_image, sample_reference)
         assert isinstance(result, np.ndarray)
         assert result.shape == sample_image.shape
+    
+    def test_transfer_reuses_algorithm_instance(self, sample_image, sample_reference):
+        """Test that repeated transfers dispatch to one cached algorithm instance."""
+        manager = HueHoppyManager()
+        manager.transfer("reinhard", sample_image, sample_reference)
+        transfer_fn = manager._dispatch["reinhard"]
+        
+        manager.transfer("reinhard", sample_image, sample_reference, preserve_luminance=True)
+        assert manager._dispatch["reinhard"] is transfer_fn
+    
+    def test_discovery_is_lazy(self, monkeypatch):
+        """Test that algorithm modules are only imported on first use."""
+        monkeypatch.setattr("huehoppy.core.manager._DISCOVERY_CACHE", None)
+        manager = HueHoppyManager()
+        assert "reinhard" in manager.get_discovered_algorithms()
+        assert manager._algorithms == {}
+        
+        manager.get_algorithm("reinhard")
+        assert "reinhard" in manager._algorithms
+    
+    def test_discovery_cache(self, monkeypatch):
+        """Test that later managers reuse the per-process discovery results."""
+        manager = HueHoppyManager()
+        
+        def fail_entry_points(*args, **kwargs):
+            raise AssertionError("entry points should not be re-read")
+        
+        monkeypatch.setattr("huehoppy.core.manager.entry_points", fail_entry_points)
+        cached = HueHoppyManager()
+        assert cached.get_discovered_algorithms() == manager.get_discovered_algorithms()
+        assert cached._targets is not manager._targets
+        
+        monkeypatch.undo()
+        cached._discover_algorithms(force=True)
+        assert "reinhard" in cached.get_discovered_algorithms()
+    
+    @pytest.mark.parametrize("api", ["select", "dict"])
+    def test_entry_point_algorithms(self, monkeypatch, api):
+        """Test that entry point algorithms are discovered with either metadata API."""
+        plugin = EntryPoint(
+            name="plugin",
+            value="huehoppy.algorithms.reinhard.algorithm:Algorithm",
+            group=ENTRY_POINT_GROUP,
+        )
+        # Python 3.10+ returns a selectable collection, 3.8/3.9 a dict keyed by group
+        if api == "select":
+            if not hasattr(importlib.metadata, "EntryPoints"):
+                pytest.skip("EntryPoints is only available on Python 3.10+")
+            registered = importlib.metadata.EntryPoints([plugin])
+        else:
+            registered = {ENTRY_POINT_GROUP: [plugin]}
+        monkeypatch.setattr("huehoppy.core.manager._DISCOVERY_CACHE", None)
+        monkeypatch.setattr("huehoppy.core.manager.entry_points", lambda: registered)
+        
+        manager = HueHoppyManager()
+        assert manager.get_available_algorithms() == ["plugin", "reinhard"]
+        assert manager.get_algorithm("plugin").get_metadata().name == "Reinhard"
+    
+    def test_unusable_algorithm_not_available(self, monkeypatch):
+        """Test that algorithms failing to load are discovered but not available."""
+        broken = EntryPoint(
+            name="broken", value="huehoppy_missing_module:Algorithm", group=ENTRY_POINT_GROUP
+        )
+        monkeypatch.setattr("huehoppy.core.manager._DISCOVERY_CACHE", None)
+        monkeypatch.setattr(
+            "huehoppy.core.manager.entry_points", lambda: {ENTRY_POINT_GROUP: [broken]}
+        )
+        
+        manager = HueHoppyManager()
+        assert manager.get_discovered_algorithms() == ["broken", "reinhard"]
+        assert manager.get_available_algorithms() == ["reinhard"]
+        assert not manager.is_algorithm_available("broken")
+        assert not manager.is_algorithm_available("nonexistent")
+        assert manager.is_algorithm_available("reinhard")
+    
+    def test_load_failure_cached(self, monkeypatch):
+        """Test that an algorithm failing to load is only imported and reported once."""
+        broken = EntryPoint(
+            name="broken", value="huehoppy_missing_module:Algorithm", group=ENTRY_POINT_GROUP
+        )
+        monkeypatch.setattr("huehoppy.core.manager._DISCOVERY_CACHE", None)
+        monkeypatch.setattr(
+            "huehoppy.core.manager.entry_points", lambda: {ENTRY_POINT_GROUP: [broken]}
+        )
+        warnings = []
+        sink_id = logger.add(warnings.append, level="WARNING")
+        try:
+            manager = HueHoppyManager()
+            manager.get_available_algorithms()
+            manager.get_available_algorithms()
+            assert not manager.is_algorithm_available("broken")
+            assert manager.get_algorithm_metadata("broken") is None
+        finally:
+            logger.remove(sink_id)
+        
+        assert len(warnings) == 1
+        assert "broken" in warnings[0]
+    
+    def test_real_entry_points(self, monkeypatch, tmp_path):
+        """Test discovery through the interpreter's own entry_points() API."""
+        dist_info = tmp_path / "huehoppy_fake_plugin-1.0.dist-info"
+        dist_info.mkdir()
+        (dist_info / "METADATA").write_text(
+            "Metadata-Version: 2.1\nName: huehoppy-fake-plugin\nVersion: 1.0\n"
+        )
+        (dist_info / "entry_points.txt").write_text(
+            f"[{ENTRY_POINT_GROUP}]\nfake = huehoppy.algorithms.reinhard:Algorithm\n"
+        )
+        monkeypatch.syspath_prepend(str(tmp_path))
+        monkeypatch.setattr("huehoppy.core.manager._DISCOVERY_CACHE", None)
+        
+        discovered = {
+            entry_point.name: entry_point.value
+            for entry_point in _iter_entry_points(ENTRY_POINT_GROUP)
+        }
+        assert discovered["fake"] == "huehoppy.algorithms.reinhard:Algorithm"
+        assert "fake" in HueHoppyManager().get_available_algorithms()
 
 
 class TestPipeline:
@@ -109,27 +265,88 @@ class TestPipeline:
         assert isinstance(result, np.ndarray)
         assert result.shape == sample_image.shape
     
+    def test_execution_leaves_source_untouched(self, sample_image, sample_reference):
+        """Test that executing a pipeline does not modify the source image."""
+        original = sample_image.copy()
+        pipeline = Pipeline()
+        pipeline.add_step("reinhard")
+        
+        result = pipeline.execute(sample_image, sample_reference)
+        assert result is not sample_image
+        np.testing.assert_array_equal(sample_image, original)
+    
+    def test_algorithm_resolved_once(self, sample_image, sample_reference, monkeypatch):
+        """Test that repeated steps and executions reuse one algorithm instance."""
+        manager = HueHoppyManager()
+        calls = []
+        get_algorithm = manager.get_algorithm
+        monkeypatch.setattr(
+            manager, "get_algorithm", lambda name: calls.append(name) or get_algorithm(name)
+        )
+        
+        pipeline = Pipeline(manager)
+        pipeline.add_step("reinhard").add_step("reinhard", {"preserve_luminance": True})
+        pipeline.execute(sample_image, sample_reference)
+        pipeline.execute(sample_image, sample_reference)
+        
+        assert calls == ["reinhard"]
+    
+    def test_unknown_algorithm_fails_before_processing(self, sample_image, sample_reference):
+        """Test that every step is resolved before any image is processed."""
+        pipeline = Pipeline()
+        pipeline.add_step("reinhard").add_step("nonexistent")
+        
+        with pytest.raises(AlgorithmError, match="Step 2 failed"):
+            pipeline.execute(sample_image, sample_reference, save_intermediate=True)
+        assert pipeline.get_intermediate_results() == ()
+    
+    def test_execute_batch_matches_execute(self, sample_image, sample_reference):
+        """Test that batched execution gives the same results as per-image runs."""
+        pipeline = Pipeline()
+        pipeline.add_step("reinhard", {"color_space": "ycrcb"})
+        pipeline.add_step("reinhard", {"preserve_luminance": True})
+        sources = [sample_image, sample_image[::-1], sample_reference]
+        
+        results = pipeline.execute_batch(sources, sample_reference)
+        assert len(results) == len(sources)
+        for source, result in zip(sources, results):
+            np.testing.assert_array_equal(result, pipeline.execute(source, sample_reference))
+        
+        stacked = pipeline.execute_batch(np.stack(sources[:2]), sample_reference)
+        np.testing.assert_array_equal(stacked[1], results[1])
+    
+    def test_base_fit_apply_fall_back_to_transfer(self, sample_image, sample_reference):
+        """Test that the default fit/apply pair delegates to transfer."""
+        class Swap(ColorTransferAlgorithm):
+            @classmethod
+            def get_metadata(cls):
+                return AlgorithmMetadata(name="Swap", description="S", author="S")
+            
+            def transfer(self, source, reference, **kwargs):
+                return reference.copy()
+        
+        algorithm = Swap()
+        fitted = algorithm.fit(sample_reference)
+        np.testing.assert_array_equal(algorithm.apply(sample_image, fitted), sample_reference)
+    
     def test_multiple_step_execution(self, sample_image, sample_reference):
-        """Test executing multi-step pipeline."""
+        """Test executing a multi-step pipeline and saving intermediate results."""
         pipeline = Pipeline()
         pipeline.add_step("reinhard", {"preserve_luminance": False})
         pipeline.add_step("reinhard", {"preserve_luminance": True})
         
-        result = pipeline.execute(sample_image, sample_reference)
+        result = pipeline.execute(sample_image, sample_reference, save_intermediate=True)
         assert isinstance(result, np.ndarray)
         assert result.shape == sample_image.shape
-    
-    def test_intermediate_results(self, sample_image, sample_reference):
-        """Test saving intermediate results."""
-        pipeline = Pipeline()
-        pipeline.add_step("reinhard")
-        pipeline.add_step("reinhard")
         
-        result = pipeline.execute(sample_image, sample_reference, save_intermediate=True)
         intermediate = pipeline.get_intermediate_results()
-        
         assert len(intermediate) == 3  # Original + 2 steps
         assert all(isinstance(img, np.ndarray) for img in intermediate)
+        assert intermediate[-1] is result
+        
+        pipeline.clear_intermediate_results()
+        assert pipeline.get_intermediate_results() == ()
+        assert len(pipeline) == 2
 
 
 class TestPipelineStep:
@@ -4,11 +4,14 @@
 # ///
 # this_file: /Users/adam/bin/pylutek
 
+import json
+import multiprocessing
 import os
 import subprocess
 import time
+from functools import lru_cache
 from pathlib import Path
-from typing import TypeAlias, Union
+from typing import Literal, TypeAlias, Union
 
 import cv2
 import numpy as np
@@ -21,8 +24,27 @@ from rich.progress import track
 # Type aliases for clarity
 NDArray: TypeAlias = np.ndarray
 PathLike: TypeAlias = Union[str, Path]
+ColorSpace: TypeAlias = Literal["lab", "rgb"]
 console = Console()
 
+# 8-bit Lab stores L * 255/100 and a, b offset by 128; these map it back to
+# float Lab units (L in [0, 100], a and b in [-128, 127])
+LAB8_SCALE = np.array([100 / 255, 1.0, 1.0], dtype=np.float32)
+LAB8_OFFSET = np.array([0.0, -128.0, -128.0], dtype=np.float32)
+LAB_MIN = np.array([0.0, -128.0, -128.0], dtype=np.float32)
+LAB_MAX = np.array([100.0, 127.0, 127.0], dtype=np.float32)
+# Squared per-channel weights that measure float Lab distances in 8-bit units
+LAB8_WEIGHT = LAB8_SCALE**-2
+# Preview renders sample this many segments of this many seconds each
+PREVIEW_SEGMENTS = 3
+PREVIEW_SEGMENT_SECONDS = 4
+# Mean/std are stable under subsampling, so larger references are decimated
+# to about this many pixels before computing their statistics
+MAX_STATS_PIXELS = 2_000_000
+# .cube rows are formatted this many at a time, so a 256-point LUT (16.7M
+# rows) never holds more than a few MB of formatting temporaries
+LUT_WRITE_CHUNK_ROWS = 65536
+
 
 class PylutekError(Exception):
     """Base exception for Pylutek errors."""
@@ -44,6 +66,13 @@ class ProcessingConfig(BaseModel):
     output_video: Path | None = None
     lut_path: Path | None = None
     quick: bool = False
+    # "rgb" skips the Lab conversions entirely at some cost in color fidelity
+    color_space: ColorSpace = "lab"
+    # Grid points per axis; ffmpeg applies the LUT with tetrahedral
+    # interpolation, which keeps 17^3 visually on par with trilinear 32^3
+    lut_size: int = 17
+    # Render only a short, half-resolution sample of the video
+    preview: bool = False
 
     @field_validator("output_video", mode="before")
     @classmethod
@@ -74,7 +103,15 @@ class ProcessingConfig(BaseModel):
             return Path(f"{source_stem}--{target_stem}.cube")
         return Path(v) if v else None
 
-    @field_validator("*")
+    @field_validator("lut_size")
+    @classmethod
+    def validate_lut_size(cls, v: int) -> int:
+        """Keep the grid within the sizes .cube files allow."""
+        if not 2 <= v <= 256:
+            raise ValueError("lut_size must be between 2 and 256")
+        return v
+
+    @field_validator("source_target_pairs", "input_video", "output_video", "lut_path")
     @classmethod
     def validate_paths(
         cls, v: PathLike | None | list[tuple[PathLike, PathLike]], info
@@ -99,120 +136,298 @@ def read_image(path: Path) -> NDArray:
     return img
 
 
+def shrink_for_stats(img: NDArray) -> NDArray:
+    """Decimate an image to at most MAX_STATS_PIXELS for computing stats."""
+    pixels = img.shape[0] * img.shape[1]
+    if pixels <= MAX_STATS_PIXELS:
+        return img
+    f = np.sqrt(MAX_STATS_PIXELS / pixels)
+    # Nearest-neighbour sampling keeps the std unbiased; area averaging
+    # would smooth the image and shrink it
+    return cv2.resize(img, (0, 0), fx=f, fy=f, interpolation=cv2.INTER_NEAREST)
+
+
 def calculate_stats(lab_img: NDArray) -> tuple[NDArray, NDArray]:
-    """Calculate mean and standard deviation of Lab image."""
-    mean = np.mean(lab_img, axis=(0, 1))
-    std = np.std(lab_img, axis=(0, 1))
+    """Calculate mean and standard deviation of an 8-bit Lab image.
+
+    The statistics are returned in float Lab units. The 8-bit encoding is a
+    per-channel affine map, so converting the six scalars is exact and the
+    image itself never has to leave uint8.
+    """
+    # Single SIMD pass for both statistics; results come back as (3, 1)
+    mean, std = cv2.meanStdDev(lab_img)
+    mean = mean.ravel().astype(np.float32) * LAB8_SCALE + LAB8_OFFSET
+    std = std.ravel().astype(np.float32) * LAB8_SCALE
     return mean, std
 
 
-def create_multi_lut(config: ProcessingConfig, verbose: bool = False) -> Path:
-    """Create a LUT from source-target pairs using direct or weighted averaging."""
+def calculate_rgb_stats(img: NDArray) -> tuple[NDArray, NDArray]:
+    """Calculate RGB mean and standard deviation of a BGR image, in [0, 1]."""
+    mean, std = cv2.meanStdDev(img)
+    mean = mean.ravel()[::-1].astype(np.float32) / 255
+    std = std.ravel()[::-1].astype(np.float32) / 255
+    return mean, std
+
+
+@lru_cache(maxsize=None)
+def create_rgb_grid(size: int) -> NDArray:
+    """Create the float32 RGB value of every cell of a size**3 LUT grid.
+
+    Cells are ordered b-major (blue slowest, red fastest), matching the
+    order in which they are written to the .cube file, and channels are in
+    [0, 1]. The grid is cached per size and returned read-only, since it is
+    shared across pairs and calls.
+    """
+    coords = np.linspace(0.0, 1.0, size, dtype=np.float32)
+    b, g, r = np.meshgrid(coords, coords, coords, indexing="ij")
+    # Stack channels in RGB order so the .cube rows need no flipping later
+    rgb_grid = np.stack((r, g, b), axis=-1).reshape(-1, 3)
+    rgb_grid.setflags(write=False)
+    return rgb_grid
+
+
+@lru_cache(maxsize=None)
+def create_lab_grid(size: int) -> NDArray:
+    """Create the Lab lookup table for every cell of a size**3 LUT grid.
+
+    Cells follow create_rgb_grid and are converted with a single float32
+    cvtColor call, so the table holds exact float Lab values rather than
+    8-bit quantized ones. Cached and read-only like the RGB grid.
+    """
+    rgb_grid = create_rgb_grid(size)
+    lab_grid = cv2.cvtColor(rgb_grid[np.newaxis], cv2.COLOR_RGB2LAB)[0]
+    lab_grid.setflags(write=False)
+    return lab_grid
+
+
+def match_pair(
+    source_path: Path, target_path: Path, size: int, color_space: ColorSpace = "lab"
+) -> tuple[NDArray, NDArray]:
+    """Transfer one pair's color statistics onto every cell of the LUT grid.
+
+    Returns the matched RGB value (in [0, 1]) of every cell and the cell's
+    similarity to the source image's color distribution.
+    """
+    source = shrink_for_stats(read_image(source_path))
+    target = shrink_for_stats(read_image(target_path))
+
+    if color_space == "rgb":
+        # Reinhard-style transfer straight on the RGB channels, no cvtColor
+        grid = create_rgb_grid(size)
+        source_mean, source_std = calculate_rgb_stats(source)
+        target_mean, target_std = calculate_rgb_stats(target)
+        weights = np.ones(3, dtype=np.float32)
+    else:
+        grid = create_lab_grid(size)
+        # The BGR pixels are not needed again, so convert each image in place
+        # instead of allocating a second full-resolution buffer
+        cv2.cvtColor(source, cv2.COLOR_BGR2LAB, dst=source)
+        cv2.cvtColor(target, cv2.COLOR_BGR2LAB, dst=target)
+        source_mean, source_std = calculate_stats(source)
+        target_mean, target_std = calculate_stats(target)
+        weights = LAB8_WEIGHT
+
+    # Whole-grid broadcasting against the (3,) pair statistics
+    delta = grid - source_mean
+    similarity = np.exp(
+        -np.einsum("ij,ij,j->i", delta, delta, weights)
+        / (4 * np.sum(source_std**2 * weights))
+    )
+
+    # delta is no longer needed, so scale, shift and clip it in place
+    matched = np.multiply(delta, target_std / source_std, out=delta)
+    matched += target_mean
+    if color_space == "rgb":
+        np.clip(matched, 0, 1, out=matched)
+    else:
+        np.clip(matched, LAB_MIN, LAB_MAX, out=matched)
+        matched = cv2.cvtColor(matched[np.newaxis], cv2.COLOR_LAB2RGB)[0]
+    return matched, similarity
+
+
+def process_pair(task: tuple[Path, Path, int, ColorSpace]) -> tuple[NDArray, NDArray]:
+    """Compute one source-target pair's weighted contribution to the LUT grid.
+
+    Returns the similarity-weighted RGB values (in [0, 1]) and the
+    similarity weights for every cell, ready to be summed across pairs.
+    """
+    matched_rgb, similarity = match_pair(*task)
+    return matched_rgb * similarity[:, np.newaxis], similarity
+
+
+def compute_lut_grid(config: ProcessingConfig, verbose: bool = False) -> NDArray:
+    """Compute the LUT grid from source-target pairs.
+
+    Uses a direct mapping for a single pair and similarity-weighted
+    averaging for several. Returns a (lut_size**3, 3) RGB array in [0, 1],
+    with rows in .cube order.
+    """
     try:
-        size = 32
-        final_grid = np.zeros((size, size, size, 3), dtype=np.float32)
+        size = config.lut_size
 
         # For single pair, use direct mapping without weighting
         is_single_pair = len(config.source_target_pairs) == 1
         if is_single_pair:
             source_path, target_path = config.source_target_pairs[0]
-            source = read_image(source_path)
-            target = read_image(target_path)
-
-            source_lab = cv2.cvtColor(source, cv2.COLOR_BGR2LAB)
-            target_lab = cv2.cvtColor(target, cv2.COLOR_BGR2LAB)
-
-            source_mean, source_std = calculate_stats(source_lab)
-            target_mean, target_std = calculate_stats(target_lab)
-
-            # Create direct mapping grid
-            for b in range(size):
-                for g in range(size):
-                    for r in range(size):
-                        rgb = np.array([r, g, b]) * (255.0 / (size - 1))
-                        bgr = rgb[::-1]
-                        lab = cv2.cvtColor(np.uint8([[bgr]]), cv2.COLOR_BGR2LAB)[0, 0]
-
-                        # Direct color transfer without weighting
-                        matched_lab = (
-                            (lab - source_mean) * (target_std / source_std)
-                        ) + target_mean
-                        matched_lab = np.clip(matched_lab, 0, 255)
-
-                        matched_bgr = cv2.cvtColor(
-                            np.uint8([[matched_lab]]), cv2.COLOR_LAB2BGR
-                        )[0, 0]
-                        final_grid[b, g, r] = matched_bgr[::-1] / 255.0
+            final_grid, _ = match_pair(
+                source_path, target_path, size, config.color_space
+            )
         else:
             # Multiple pairs - use weighted averaging
-            weight_sum = np.zeros((size, size, size), dtype=np.float32)
-            pairs_iter = (
-                track(
-                    config.source_target_pairs,
-                    description="Processing image pairs",
-                )
-                if verbose
-                else config.source_target_pairs
-            )
-            for source_path, target_path in pairs_iter:
-                source = read_image(source_path)
-                target = read_image(target_path)
-
-                source_lab = cv2.cvtColor(source, cv2.COLOR_BGR2LAB)
-                target_lab = cv2.cvtColor(target, cv2.COLOR_BGR2LAB)
-
-                source_mean, source_std = calculate_stats(source_lab)
-                target_mean, target_std = calculate_stats(target_lab)
-
-                for b in range(size):
-                    for g in range(size):
-                        for r in range(size):
-                            rgb = np.array([r, g, b]) * (255.0 / (size - 1))
-                            bgr = rgb[::-1]
-                            lab = cv2.cvtColor(np.uint8([[bgr]]), cv2.COLOR_BGR2LAB)[
-                                0, 0
-                            ]
-
-                            similarity = np.exp(
-                                -np.sum((lab - source_mean) ** 2)
-                                / (4 * np.sum(source_std**2))
-                            )
-
-                            matched_lab = (
-                                (lab - source_mean) * (target_std / source_std)
-                            ) + target_mean
-                            matched_lab = np.clip(matched_lab, 0, 255)
-
-                            matched_bgr = cv2.cvtColor(
-                                np.uint8([[matched_lab]]), cv2.COLOR_LAB2BGR
-                            )[0, 0]
-
-                            final_grid[b, g, r] += matched_bgr[::-1] * similarity
-                            weight_sum[b, g, r] += similarity
+            final_grid = np.zeros((size**3, 3), dtype=np.float32)
+            weight_sum = np.zeros(size**3, dtype=np.float32)
+            # Pairs are independent, so weigh them in worker processes and
+            # reduce the partial grids here in submission order
+            tasks = [
+                (*pair, size, config.color_space)
+                for pair in config.source_target_pairs
+            ]
+            processes = min(os.cpu_count() or 1, len(tasks))
+            # One OpenCV thread per worker avoids oversubscribing the cores
+            with multiprocessing.Pool(
+                processes, initializer=cv2.setNumThreads, initargs=(1,)
+            ) as pool:
+                results = pool.imap(process_pair, tasks, chunksize=1)
+                if verbose:
+                    results = track(
+                        results,
+                        description="Processing image pairs",
+                        total=len(tasks),
+                    )
+                for weighted_rgb, similarity in results:
+                    final_grid += weighted_rgb
+                    weight_sum += similarity
 
             # Normalize by total weights
-            weight_sum = np.maximum(weight_sum, 1e-6)[:, :, :, np.newaxis]
-            final_grid = final_grid / weight_sum
+            np.maximum(weight_sum, 1e-6, out=weight_sum)
+            final_grid /= weight_sum[:, np.newaxis]
 
         # Ensure output is in valid range [0, 1]
-        final_grid = np.clip(final_grid, 0, 1)
+        np.clip(final_grid, 0, 1, out=final_grid)
+        return final_grid
 
-        # Save combined LUT
-        if config.lut_path is None:
-            raise ImageProcessingError("LUT path is not set")
+    except Exception as e:
+        raise ImageProcessingError(f"Failed to create LUT: {str(e)}") from e
 
+
+def write_lut(config: ProcessingConfig, lut_grid: NDArray) -> Path:
+    """Save a LUT grid as a .cube file at the configured LUT path."""
+    if config.lut_path is None:
+        raise ImageProcessingError("LUT path is not set")
+
+    try:
+        # Rows are already in .cube order (red fastest, blue slowest); format
+        # each chunk with one %-operation instead of savetxt's per-row loop
+        row_format = "%.6f %.6f %.6f\n"
         with open(config.lut_path, "w") as f:
-            f.write(f"LUT_3D_SIZE {size}\n")
-            for b in range(size):
-                for g in range(size):
-                    for r in range(size):
-                        rgb = final_grid[b, g, r]
-                        f.write(f"{rgb[0]:.6f} {rgb[1]:.6f} {rgb[2]:.6f}\n")
+            f.write(f"LUT_3D_SIZE {config.lut_size}\n")
+            for start in range(0, len(lut_grid), LUT_WRITE_CHUNK_ROWS):
+                chunk = lut_grid[start : start + LUT_WRITE_CHUNK_ROWS]
+                f.write((row_format * len(chunk)) % tuple(chunk.ravel().tolist()))
+    except OSError as e:
+        raise ImageProcessingError(f"Failed to write LUT: {str(e)}") from e
 
-        return config.lut_path
+    return config.lut_path
 
-    except Exception as e:
-        raise ImageProcessingError(f"Failed to create LUT: {str(e)}") from e
+
+def create_multi_lut(config: ProcessingConfig, verbose: bool = False) -> Path:
+    """Create a LUT from source-target pairs using direct or weighted averaging."""
+    return write_lut(config, compute_lut_grid(config, verbose))
+
+
+def expand_lut(lut_grid: NDArray, size: int) -> NDArray:
+    """Expand a LUT grid into a full 8-bit BGR table for every 24-bit color.
+
+    The table is indexed by (b << 16) | (g << 8) | r. Trilinear
+    interpolation is separable, so the grid is interpolated one axis at a
+    time, with the last (blue) axis filled plane by plane to bound memory.
+    """
+    pos = np.linspace(0, size - 1, 256, dtype=np.float32)
+    lo = np.minimum(pos.astype(np.intp), size - 2)
+    frac = pos - lo
+
+    def lerp(grid: NDArray, axis: int) -> NDArray:
+        shape = [1] * grid.ndim
+        shape[axis] = 256
+        w = frac.reshape(shape)
+        low = np.take(grid, lo, axis=axis)
+        return low + (np.take(grid, lo + 1, axis=axis) - low) * w
+
+    # Grid axes are (b, g, r); flip channels to BGR and scale to 8-bit
+    grid = lut_grid.reshape(size, size, size, 3)[..., ::-1].astype(np.float32) * 255
+    grid = lerp(lerp(grid, 2), 1)
+
+    table = np.empty((256, 256, 256, 3), dtype=np.uint8)
+    for b in range(256):
+        low = grid[lo[b]]
+        plane = low + (grid[lo[b] + 1] - low) * frac[b]
+        table[b] = np.rint(plane, out=plane)
+    return table.reshape(-1, 3)
+
+
+def apply_lut(frame: NDArray, table: NDArray) -> NDArray:
+    """Map a BGR frame through a table built by expand_lut."""
+    b, g, r = cv2.split(frame)
+    index = (b.astype(np.int32) << 16) | (g.astype(np.int32) << 8) | r
+    return np.take(table, index, axis=0)
+
+
+@lru_cache(maxsize=None)
+def ffmpeg_hwaccels() -> frozenset[str]:
+    """Return the hardware acceleration methods the local ffmpeg supports."""
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-hwaccels"],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return frozenset()
+    # The first line is the "Hardware acceleration methods:" header
+    return frozenset(
+        line.strip() for line in result.stdout.splitlines()[1:] if line.strip()
+    )
+
+
+def build_ffmpeg_command(
+    config: ProcessingConfig, verbose: bool = False, gpu: bool = False
+) -> list[str]:
+    """Build the ffmpeg command that applies the LUT to the input video.
+
+    With gpu set, decoding runs on CUDA and encoding on NVENC; the decoded
+    frames are downloaded for the CPU lut3d filter.
+    """
+    ffmpeg_loglevel = "info" if verbose else "warning"
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-loglevel",
+        ffmpeg_loglevel,
+        "-threads",
+        str(os.cpu_count()),
+    ]
+    if gpu:
+        cmd.extend(["-hwaccel", "cuda"])
+    cmd.extend(
+        [
+            "-i",
+            str(config.input_video),
+            "-vf",
+            f"lut3d={config.lut_path}:interp=tetrahedral,format=yuv420p",
+            "-c:a",
+            "copy",
+        ]
+    )
+
+    # Encoder options must come before the output path to take effect
+    if gpu:
+        cmd.extend(["-c:v", "h264_nvenc", "-preset", "p1"])
+    elif config.quick:
+        cmd.extend(["-c:v", "libx264", "-preset", "ultrafast"])
+
+    cmd.append(str(config.output_video))
+    return cmd
 
 
 def process_video(config: ProcessingConfig, verbose: bool = False) -> None:
@@ -221,43 +436,276 @@ def process_video(config: ProcessingConfig, verbose: bool = False) -> None:
         if not config.input_video or not config.output_video:
             raise ValueError("Input and output video paths must be set")
 
+        # Quick mode keeps decode and encode on an NVIDIA GPU when available
+        gpu = config.quick and "cuda" in ffmpeg_hwaccels()
+        cmd = build_ffmpeg_command(config, verbose, gpu)
+
+        if verbose:
+            logger.info("Processing video with command: {}", " ".join(cmd))
+            start_time = time.time()
+
+        try:
+            subprocess.run(cmd, check=True, capture_output=not verbose, text=True)
+        except subprocess.CalledProcessError as e:
+            if not gpu:
+                raise
+            # In verbose mode ffmpeg's stderr went to the terminal, not e.stderr
+            logger.warning(
+                "GPU processing failed with exit code {}, retrying on CPU: {}",
+                e.returncode,
+                (e.stderr or "").strip() or "see ffmpeg output above",
+            )
+            cmd = build_ffmpeg_command(config, verbose)
+            subprocess.run(cmd, check=True, capture_output=not verbose, text=True)
+
+        if verbose:
+            end_time = time.time()
+            duration = end_time - start_time
+            logger.info("Success! Processed video saved to: {}", config.output_video)
+            logger.info("Processing completed in {:.2f} seconds", duration)
+
+    except subprocess.CalledProcessError as e:
+        logger.error("FFmpeg processing failed: {}", e.stderr)
+        raise RuntimeError(f"FFmpeg processing failed: {e.stderr}") from e
+    except Exception as e:
+        logger.error("Video processing failed: {}", str(e))
+        raise RuntimeError(f"Video processing failed: {str(e)}") from e
+
+
+def probe_video(path: Path) -> tuple[int, int, str]:
+    """Return the displayed width, height and frame rate of a video's first stream.
+
+    ffmpeg autorotates decoded frames, so for streams rotated by 90 or 270
+    degrees the coded width and height are swapped to match what it outputs.
+    """
+    result = subprocess.run(
+        [
+            "ffprobe",
+            "-v",
+            "error",
+            "-select_streams",
+            "v:0",
+            "-show_entries",
+            "stream=width,height,r_frame_rate:stream_tags=rotate"
+            ":stream_side_data=rotation",
+            "-of",
+            "json",
+            str(path),
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    stream = json.loads(result.stdout)["streams"][0]
+    width, height = int(stream["width"]), int(stream["height"])
+
+    # Newer ffmpeg reports a display matrix side data entry, older a rotate tag
+    rotation = stream.get("tags", {}).get("rotate", 0)
+    for side_data in stream.get("side_data_list", []):
+        rotation = side_data.get("rotation", rotation)
+    if int(float(rotation)) % 180 == 90:
+        width, height = height, width
+    return width, height, stream["r_frame_rate"]
+
+
+def process_video_inprocess(
+    config: ProcessingConfig, lut_grid: NDArray, verbose: bool = False
+) -> None:
+    """Process a video by applying the LUT in Python between two ffmpeg pipes.
+
+    Raw BGR frames are decoded by one ffmpeg, mapped through the expanded
+    LUT table and piped into a second ffmpeg for encoding. This skips the
+    lut3d filter and re-reading the .cube file, which suits short clips and
+    quick previews.
+    """
+    try:
+        if not config.input_video or not config.output_video:
+            raise ValueError("Input and output video paths must be set")
+
+        width, height, rate = probe_video(config.input_video)
+        table = expand_lut(lut_grid, config.lut_size)
+
         ffmpeg_loglevel = "info" if verbose else "warning"
-        cmd = [
+        decode_cmd = [
+            "ffmpeg",
+            "-loglevel",
+            ffmpeg_loglevel,
+            "-i",
+            str(config.input_video),
+            "-f",
+            "rawvideo",
+            "-pix_fmt",
+            "bgr24",
+            "-",
+        ]
+        encode_cmd = [
             "ffmpeg",
             "-y",
             "-loglevel",
             ffmpeg_loglevel,
-            "-threads",
-            str(os.cpu_count()),
+            "-f",
+            "rawvideo",
+            "-pix_fmt",
+            "bgr24",
+            "-s",
+            f"{width}x{height}",
+            "-framerate",
+            rate,
+            "-i",
+            "-",
             "-i",
             str(config.input_video),
-            "-vf",
-            f"lut3d={config.lut_path},format=yuv420p",
+            "-map",
+            "0:v",
+            "-map",
+            "1:a?",
             "-c:a",
             "copy",
-            str(config.output_video),
+            "-pix_fmt",
+            "yuv420p",
         ]
-
         if config.quick:
+            encode_cmd.extend(["-c:v", "libx264", "-preset", "ultrafast"])
+        encode_cmd.append(str(config.output_video))
+
+        if verbose:
+            logger.info("Decoding with command: {}", " ".join(decode_cmd))
+            logger.info("Encoding with command: {}", " ".join(encode_cmd))
+            start_time = time.time()
+
+        frame_bytes = width * height * 3
+        with (
+            subprocess.Popen(decode_cmd, stdout=subprocess.PIPE) as decoder,
+            subprocess.Popen(encode_cmd, stdin=subprocess.PIPE) as encoder,
+        ):
+            try:
+                while len(chunk := decoder.stdout.read(frame_bytes)) == frame_bytes:
+                    frame = np.frombuffer(chunk, dtype=np.uint8)
+                    frame = frame.reshape(height, width, 3)
+                    encoder.stdin.write(apply_lut(frame, table).tobytes())
+                encoder.stdin.close()
+            except BaseException:
+                # Don't leave the decoder blocked on a full pipe
+                decoder.kill()
+                raise
+
+        if decoder.returncode or encoder.returncode:
+            raise RuntimeError(
+                f"ffmpeg exited with status {decoder.returncode or encoder.returncode}"
+            )
+
+        if verbose:
+            duration = time.time() - start_time
+            logger.info("Success! Processed video saved to: {}", config.output_video)
+            logger.info("Processing completed in {:.2f} seconds", duration)
+
+    except Exception as e:
+        logger.error("Video processing failed: {}", str(e))
+        raise RuntimeError(f"Video processing failed: {str(e)}") from e
+
+
+def probe_duration(path: Path) -> float:
+    """Return the duration of a video in seconds."""
+    result = subprocess.run(
+        [
+            "ffprobe",
+            "-v",
+            "error",
+            "-show_entries",
+            "format=duration",
+            "-of",
+            "csv=p=0",
+            str(path),
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return float(result.stdout.strip())
+
+
+def preview_path(config: ProcessingConfig) -> Path:
+    """Return where the preview of the output video is written."""
+    if not config.output_video:
+        raise ValueError("Output video path must be set")
+    return config.output_video.with_stem(f"{config.output_video.stem}_preview")
+
+
+def build_preview_command(
+    config: ProcessingConfig, duration: float, verbose: bool = False
+) -> list[str]:
+    """Build the ffmpeg command that renders a LUT preview of the input video.
+
+    Short segments spread across the video are seeked to directly (so the
+    rest is never decoded), concatenated, graded at half resolution and
+    encoded with the fastest x264 preset. Audio is dropped.
+    """
+    ffmpeg_loglevel = "info" if verbose else "warning"
+    cmd = ["ffmpeg", "-y", "-loglevel", ffmpeg_loglevel]
+
+    segment_total = PREVIEW_SEGMENTS * PREVIEW_SEGMENT_SECONDS
+    if duration <= segment_total:
+        starts = [0.0]
+        cmd.extend(["-i", str(config.input_video)])
+    else:
+        # Centre each segment in an equal slice of the video
+        slice_length = duration / PREVIEW_SEGMENTS
+        starts = [
+            i * slice_length + (slice_length - PREVIEW_SEGMENT_SECONDS) / 2
+            for i in range(PREVIEW_SEGMENTS)
+        ]
+        for start in starts:
             cmd.extend(
                 [
-                    "-preset",
-                    "ultrafast",
-                    "-c:v",
-                    "h264_nvenc",
+                    "-ss",
+                    f"{start:.3f}",
+                    "-t",
+                    str(PREVIEW_SEGMENT_SECONDS),
+                    "-i",
+                    str(config.input_video),
                 ]
             )
 
+    inputs = "".join(f"[{i}:v]" for i in range(len(starts)))
+    cmd.extend(
+        [
+            "-filter_complex",
+            f"{inputs}concat=n={len(starts)}:v=1:a=0,"
+            # Halve the size, rounded to even dimensions for yuv420p
+            "scale=trunc(iw/4)*2:trunc(ih/4)*2,"
+            f"lut3d={config.lut_path}:interp=tetrahedral,"
+            "format=yuv420p[v]",
+            "-map",
+            "[v]",
+            "-an",
+            "-c:v",
+            "libx264",
+            "-preset",
+            "ultrafast",
+            str(preview_path(config)),
+        ]
+    )
+    return cmd
+
+
+def preview_video(config: ProcessingConfig, verbose: bool = False) -> None:
+    """Render a quick, sampled preview of the video with the LUT applied."""
+    try:
+        if not config.input_video or not config.output_video:
+            raise ValueError("Input and output video paths must be set")
+
+        duration = probe_duration(config.input_video)
+        cmd = build_preview_command(config, duration, verbose)
+
         if verbose:
-            logger.info("Processing video with command: {}", " ".join(cmd))
+            logger.info("Rendering preview with command: {}", " ".join(cmd))
             start_time = time.time()
 
         subprocess.run(cmd, check=True, capture_output=not verbose, text=True)
 
         if verbose:
-            end_time = time.time()
-            duration = end_time - start_time
-            logger.info("Success! Processed video saved to: {}", config.output_video)
+            duration = time.time() - start_time
+            logger.info("Success! Preview saved to: {}", preview_path(config))
             logger.info("Processing completed in {:.2f} seconds", duration)
 
     except subprocess.CalledProcessError as e:
@@ -274,6 +722,10 @@ def cli(
     output_video: str = None,
     lut_path: str = None,
     quick: bool = False,
+    color_space: ColorSpace = "lab",
+    lut_size: int = 17,
+    inprocess: bool = False,
+    preview: bool = False,
     verbose: bool = False,
 ) -> None:
     """Process multiple source-target image pairs and optionally apply to video.
@@ -283,6 +735,10 @@ def cli(
         input_video: Optional input video to process
         output_video: Optional output video path
         lut_path: Optional path for the LUT file
+        color_space: Space for the color transfer, "lab" or the faster "rgb"
+        lut_size: Number of LUT grid points per axis
+        inprocess: Apply the LUT in Python between ffmpeg pipes (for short videos)
+        preview: Only render a short, half-resolution sample to check the LUT
         verbose: Whether to log additional information
     """
     import sys
@@ -301,16 +757,25 @@ def cli(
         output_video=output_video,
         lut_path=lut_path,
         quick=quick,
+        color_space=color_space,
+        lut_size=lut_size,
+        preview=preview,
     )
 
     # Create LUT
-    lut_file = create_multi_lut(config, verbose=verbose)
+    lut_grid = compute_lut_grid(config, verbose=verbose)
+    lut_file = write_lut(config, lut_grid)
     if verbose:
         logger.info(f"Created LUT file: {lut_file}")
 
     # Process video if provided
     if config.input_video:
-        process_video(config, verbose=verbose)
+        if config.preview:
+            preview_video(config, verbose=verbose)
+        elif inprocess:
+            process_video_inprocess(config, lut_grid, verbose=verbose)
+        else:
+            process_video(config, verbose=verbose)
 
 
 if __name__ == "__main__":